@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# Import the URLconf with every view and serializer now instead of on the
+# first request, so servers that preload the app fork ready workers.
+get_resolver().url_patterns
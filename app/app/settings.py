@@ -24,7 +24,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('SECRET_KEY', 'changeme')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = bool(int(os.environ.get('DEBUG', 0)))
 
 ALLOWED_HOSTS = []
 
@@ -37,8 +37,12 @@ ALLOWED_HOSTS.extend(
 
 # Application definition
 
+# Optional apps, workers that only serve the API can boot without them.
+ENABLE_ADMIN = bool(int(os.environ.get('ENABLE_ADMIN', 1)))
+ENABLE_API_DOCS = bool(int(os.environ.get('ENABLE_API_DOCS', 1)))
+ENABLE_METRICS = bool(int(os.environ.get('ENABLE_METRICS', 1)))
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -47,14 +51,25 @@ INSTALLED_APPS = [
     'core',
     'rest_framework',
     'rest_framework.authtoken',
-    'drf_spectacular',
     'user',
     'robot',
     'package',
 ]
 
+if ENABLE_ADMIN:
+    INSTALLED_APPS.insert(0, 'django.contrib.admin')
+
+if ENABLE_API_DOCS:
+    INSTALLED_APPS.append('drf_spectacular')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.RequestQueriesMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,16 +102,84 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# `DB_CONN_MAX_AGE` keeps connections open between requests (seconds,
+# empty for unlimited) and `DB_CONN_HEALTH_CHECKS` pings them before reuse.
+# `DB_POOL_MAX_SIZE` switches to an in-process pool shared by the threads
+# of a worker, in which case connections go back to the pool after every
+# request instead of being kept by the thread. Every thread of a worker
+# holds one connection while it serves a request, so with fewer than
+# `GUNICORN_THREADS` connections the extra threads wait up to
+# `DB_POOL_TIMEOUT` seconds for one and then answer 503.
+
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None,
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        } if DB_POOL_MAX_SIZE else None,
+    }
+}
+
+if DB_POOL_MAX_SIZE:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Read replicas of the primary, one alias per host in `DB_REPLICA_HOSTS`.
+# Safe requests read from a replica, writes and the reads that follow them
+# (for `DATABASE_REPLICA_PIN_SECONDS` on the same client) use the primary.
+# Clients are pinned by their `Authorization` header in the cache, shared
+# by the workers with `CACHE_DIR`, or by a cookie without credentials.
+
+DATABASE_REPLICAS = []
+
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_PIN_COOKIE = 'pin_primary'
+DATABASE_REPLICA_PIN_CACHE = 'default'
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get('DB_REPLICA_PIN_SECONDS', 5)
+)
+
+# Cache shared by the worker processes of a container when `CACHE_DIR`
+# is set, without it every process has its own in-memory cache.
+
+CACHE_DIR = os.environ.get('CACHE_DIR', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    } if CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
 
+# Hash partitions of the robot and package tables by user, created by
+# migration 0012 when set (or later by `manage.py partition_by_user`).
+DATABASE_TENANT_PARTITIONS = int(os.environ.get('DB_TENANT_PARTITIONS', 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -140,6 +223,95 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# OpenAPI schema precomputed by `manage.py generate_schema`.
+API_SCHEMA_ROOT = os.environ.get('API_SCHEMA_ROOT', '/vol/web/schema')
+
+# Response compression, see `core.middleware.CompressionMiddleware`.
+# Levels favour CPU cost over ratio, brotli and zstd are used when their
+# packages are installed.
+
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_LEVELS = {
+    'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3)),
+    'br': int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4)),
+    'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 5)),
+}
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 512))
+COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'application/msgpack',
+    'application/vnd.oai.openapi',
+    'application/x-ndjson',
+    'text/',
+]
+
+# Rows fetched per round trip by the NDJSON export endpoints.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Per process index answering `/api/robot/fits/` without querying robots,
+# entries are outdated through a generation in the cache shared by the
+# workers (see `CACHE_DIR`).
+ROBOT_CAPACITY_INDEX = bool(int(os.environ.get('ROBOT_CAPACITY_INDEX', 0)))
+ROBOT_CAPACITY_INDEX_CACHE = 'default'
+
+# Rows per DELETE statement of `/api/package/bulk-delete/`.
+BULK_DELETE_CHUNK_SIZE = int(os.environ.get('BULK_DELETE_CHUNK_SIZE', 1000))
+
+# Responses replayed for requests retried with an `Idempotency-Key`, rows
+# past the TTL are removed by `manage.py clear_idempotency_keys`, which the
+# maintenance service of the deploy runs every `MAINTENANCE_INTERVAL`.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+IDEMPOTENCY_CACHE = 'default'
+# A key is reserved in `IDEMPOTENCY_CACHE` while its request runs, at most
+# this many seconds in case the worker dies before releasing it.
+IDEMPOTENCY_LOCK_TTL = 60
+
+# Share of requests timed with a `Server-Timing` header and a log line,
+# queries slower than `SERVER_TIMING_SLOW_QUERY_MS` are kept per endpoint.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('SERVER_TIMING_SAMPLE_RATE', 0)
+)
+SERVER_TIMING_SLOW_QUERY_MS = int(
+    os.environ.get('SERVER_TIMING_SLOW_QUERY_MS', 100)
+)
+SERVER_TIMING_SLOW_QUERIES = 5
+
+# Metrics served on `/metrics` to staff users and to scrapers sending
+# `Authorization: Bearer <METRICS_TOKEN>`. With several worker processes,
+# each one writes its values to `METRICS_DIR` every
+# `METRICS_FLUSH_SECONDS` and a scrape sums them. The fleet gauges are
+# recomputed at most every `METRICS_FLEET_TTL` seconds.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = 1
+METRICS_FLEET_TTL = int(os.environ.get('METRICS_FLEET_TTL', 5))
+
+# What to do when a request makes more queries than the `query_budgets`
+# of its view allow: `off`, `log` or `raise`.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'log')
+
+# Staff users can profile a request with `X-Profile: 1`, the newest
+# profiles are kept within the count and size limits. They are stored out
+# of /vol/web, which the proxy serves.
+PROFILING_ENABLED = bool(int(os.environ.get('PROFILING_ENABLED', 0)))
+PROFILING_ROOT = os.environ.get('PROFILING_ROOT', '/vol/profiles')
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 100))
+PROFILING_MAX_BYTES = int(
+    os.environ.get('PROFILING_MAX_BYTES', 50 * 1024 * 1024)
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO'},
+        'core.middleware': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -148,12 +320,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
        'rest_framework.authentication.TokenAuthentication',
-   )
+   ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_FILTER_BACKENDS': (
+        'core.filters.LookupFilterBackend',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'EXCEPTION_HANDLER': 'core.exceptions.exception_handler',
 }
 
+if ENABLE_API_DOCS:
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = (
+        'drf_spectacular.openapi.AutoSchema'
+    )
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True
 }
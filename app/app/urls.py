@@ -13,28 +13,38 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView
-)
-from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path(
-        'api/docs',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs'
-        ),
     path('api/user/', include('user.urls')),
     path('api/', include('robot.urls')),
     path('api/', include('package.urls'))
 ]
 
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.ENABLE_METRICS:
+    from core.views import metrics_view
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
+
+if settings.ENABLE_API_DOCS:
+    from drf_spectacular.views import SpectacularSwaggerView
+    from core.views import schema_view
+
+    urlpatterns += [
+        path('api/schema/', schema_view, name='api-schema'),
+        path(
+            'api/docs',
+            SpectacularSwaggerView.as_view(url_name='api-schema'),
+            name='api-docs'
+            ),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
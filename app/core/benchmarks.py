@@ -0,0 +1,98 @@
+"""
+Helpers for the benchmark commands.
+"""
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+
+from core.models import Package, Robot
+
+
+def create_benchmark_user():
+    """Create and return a throwaway user to own benchmark data."""
+    return get_user_model().objects.create_user(
+        email=f'benchmark-{uuid.uuid4().hex}@example.com',
+        password=uuid.uuid4().hex,
+    )
+
+
+def create_fleet(user, robots, packages_per_robot=0):
+    """Create robots for `user`, each loaded with its own packages."""
+    robot_objs = Robot.objects.bulk_create(
+        Robot(
+            user=user,
+            serial_number=f'BENCH-{user.id}-{i}',
+            robot_model=Robot.ROBOT_MODEL.hw,
+            weight_limit=Robot.ROBOT_WEIGHTS[Robot.ROBOT_MODEL.hw],
+            state=i % len(Robot.ROBOT_STATUS),
+        )
+        for i in range(robots)
+    )
+    package_objs = Package.objects.bulk_create(
+        Package(
+            user=user,
+            code=f'BENCH_{user.id}_{i}',
+            name=f'Package-{i}',
+            weight=10,
+        )
+        for i in range(robots * packages_per_robot)
+    )
+
+    through = Robot.packages.through
+    through.objects.bulk_create(
+        through(
+            user_id=package.user_id,
+            robot_id=robot_objs[i // packages_per_robot].pk,
+            package_id=package.pk,
+        )
+        for i, package in enumerate(package_objs)
+    )
+
+    return robot_objs, package_objs
+
+
+def create_tenant_fleets(tenants, robots):
+    """Create `tenants` users and spread `robots` over them in SQL."""
+    batch = uuid.uuid4().hex
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=f'benchmark-{batch}-{i}@example.com',
+            password=make_password(None),
+        )
+        for i in range(tenants)
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Robot._meta.db_table}
+                (serial_number, user_id, robot_model, weight_limit,
+                 battery, state)
+            SELECT
+                'BENCH-' || users.id || '-' || k,
+                users.id,
+                k %% 4,
+                (%s::int[])[k %% 4 + 1] - (k * 7) %% 100,
+                (k * 37) %% 101,
+                k %% %s
+            FROM (
+                SELECT i %% %s + 1 AS n, i / %s AS k
+                FROM generate_series(0, %s - 1) AS i
+            ) AS robots
+            JOIN unnest(%s::bigint[]) WITH ORDINALITY AS users(id, n)
+                USING (n)
+            """,
+            [
+                Robot.ROBOT_WEIGHTS,
+                len(Robot.ROBOT_STATUS),
+                tenants,
+                tenants,
+                robots,
+                [user.id for user in users],
+            ],
+        )
+        cursor.execute(f'ANALYZE {Robot._meta.db_table}')
+
+    return users
@@ -0,0 +1,111 @@
+"""
+In-memory index of the remaining capacity of available robots.
+"""
+import bisect
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.metrics import cache_requests
+from core.models import Package, Robot
+
+
+AVAILABLE_STATES = [Robot.ROBOT_STATUS.idl, Robot.ROBOT_STATUS.ldg]
+
+
+class CapacityIndex:
+    """
+    Available robots of each user, sorted by remaining capacity.
+
+    Entries are loaded on first use and kept by the process. Every user
+    has a generation in `ROBOT_CAPACITY_INDEX_CACHE`, replaced when one of
+    their robots or packages is written, and an entry is only used while
+    it was loaded at the current generation. Writes of any process are
+    so seen by the next lookup.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def fits(self, user_id, weight, limit, load):
+        """
+        Return the robots that fit `weight`, best fit first.
+
+        `load(user_id)` returns the `(capacity, robot)` pairs of the
+        available robots of the user sorted by capacity, it is called when
+        the entry of the user is missing or outdated.
+        """
+        capacities, robots = self._get(user_id, load)
+        start = bisect.bisect_left(capacities, weight)
+        return robots[start:start + limit]
+
+    def invalidate(self, user_id):
+        """Outdate the entry of `user_id` in every process."""
+        self._new_generation(user_id)
+        if connection.in_atomic_block:
+            # Another process may load the entry again before the write is
+            # committed, so the generation is replaced once more after.
+            transaction.on_commit(lambda: self._new_generation(user_id))
+
+    def clear(self):
+        """Drop every entry of this process."""
+        with self._lock:
+            self._entries.clear()
+
+    def _cache_key(self, user_id):
+        return f'capacity_index:{user_id}'
+
+    def _new_generation(self, user_id):
+        generation = uuid.uuid4().hex
+        caches[settings.ROBOT_CAPACITY_INDEX_CACHE].set(
+            self._cache_key(user_id),
+            generation,
+            None,
+        )
+        return generation
+
+    def _generation(self, user_id):
+        generation = caches[settings.ROBOT_CAPACITY_INDEX_CACHE].get(
+            self._cache_key(user_id),
+        )
+        if generation is None:
+            # Evicted or never written, every entry of the user is outdated.
+            generation = self._new_generation(user_id)
+        return generation
+
+    def _get(self, user_id, load):
+        generation = self._generation(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[0] == generation:
+            cache_requests.inc(cache='capacity_index', result='hit')
+            return entry[1], entry[2]
+        cache_requests.inc(cache='capacity_index', result='miss')
+
+        pairs = load(user_id)
+        capacities = [capacity for capacity, _ in pairs]
+        robots = [robot for _, robot in pairs]
+
+        # Loaded at `generation`, a write since then outdates it right away.
+        with self._lock:
+            self._entries[user_id] = (generation, capacities, robots)
+
+        return capacities, robots
+
+
+capacity_index = CapacityIndex()
+
+
+@receiver(post_save, sender=Robot)
+@receiver(post_delete, sender=Robot)
+@receiver(post_save, sender=Package)
+@receiver(post_delete, sender=Package)
+def invalidate_capacity_index(sender, instance, *args, **kwargs):
+    """Outdate the robots of `instance.user`, they list package codes."""
+    capacity_index.invalidate(instance.user_id)
@@ -0,0 +1,83 @@
+"""
+Response body compression.
+"""
+import importlib.util
+import zlib
+
+from django.conf import settings
+
+
+class GzipCompressor:
+    """Incremental gzip compressor."""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    """Incremental brotli compressor."""
+
+    def __init__(self, level):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    """Incremental zstd compressor."""
+
+    def __init__(self, level):
+        import zstandard
+
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+COMPRESSORS = {'gzip': GzipCompressor}
+
+# The optional codecs are only looked up here, and imported by the first
+# response they compress.
+if importlib.util.find_spec('brotli') is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+
+if importlib.util.find_spec('zstandard') is not None:
+    COMPRESSORS['zstd'] = ZstdCompressor
+
+
+def get_compressor(encoding):
+    """Return a new compressor for `encoding` at the configured level."""
+    return COMPRESSORS[encoding](settings.COMPRESSION_LEVELS[encoding])
+
+
+def compress(encoding, data):
+    """Compress `data` in one go."""
+    compressor = get_compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(encoding, chunks):
+    """Compress an iterable of chunks as they are produced."""
+    compressor = get_compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.finish()
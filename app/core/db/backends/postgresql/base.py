@@ -0,0 +1,155 @@
+"""
+PostgreSQL backend with connection health checks and optional pooling.
+"""
+import os
+import threading
+
+from psycopg2 import OperationalError, extras, pool
+
+from django.db.backends.postgresql import base
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """No connection of the pool was given back in time."""
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """
+    Threaded pool whose `getconn` waits for a connection to be given back
+    when all of them are taken, instead of failing right away.
+    """
+
+    def __init__(self, min_size, max_size, *args, **kwargs):
+        super().__init__(min_size, max_size, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def getconn(self, key=None, timeout=None):
+        """Take a connection, waiting at most `timeout` seconds for one."""
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(
+                f'No database connection was free within {timeout}s.'
+            )
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        """Give a connection back and wake up a waiting thread."""
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+def get_pool(conn_params, min_size, max_size):
+    """Return the process-wide connection pool for `conn_params`."""
+    key = (os.getpid(), tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BlockingConnectionPool(
+                min_size,
+                max_size,
+                **conn_params
+            )
+
+        return _pools[key]
+
+
+def close_pools():
+    """Close every connection held by the pools of this process."""
+    with _pools_lock:
+        for key in [k for k in _pools if k[0] == os.getpid()]:
+            _pools.pop(key).closeall()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Database wrapper for persistent and pooled connections.
+
+    `CONN_HEALTH_CHECKS` pings a reused persistent connection once per
+    request before the first query. A `POOL` dict (`MIN_SIZE`,
+    `MAX_SIZE`, `TIMEOUT`) hands connections out of an in-process pool
+    shared by the threads of a worker, and closing a connection returns it
+    there. A thread finding the pool empty waits up to `TIMEOUT` seconds,
+    then `PoolTimeout` is raised.
+    """
+    health_check_enabled = False
+    health_check_done = False
+    connection_pool = None
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get('POOL') or None
+
+    def connect(self):
+        """Connect to the database and reset the health check flags."""
+        self.health_check_enabled = bool(
+            self.settings_dict.get('CONN_HEALTH_CHECKS')
+        )
+        self.health_check_done = True
+        super().connect()
+
+    def get_new_connection(self, conn_params):
+        """Open a new connection or take one from the pool."""
+        options = self.pool_options
+        if options is None:
+            return super().get_new_connection(conn_params)
+
+        self.connection_pool = get_pool(
+            conn_params,
+            options.get('MIN_SIZE', 1),
+            options.get('MAX_SIZE', 10),
+        )
+        connection = self.connection_pool.getconn(
+            timeout=options.get('TIMEOUT', 10),
+        )
+
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = connection.isolation_level
+        else:
+            self.isolation_level = isolation_level
+            if connection.isolation_level != isolation_level:
+                connection.set_session(isolation_level=isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection,
+            loads=lambda x: x,
+        )
+
+        return connection
+
+    def _close(self):
+        """Close the connection or give it back to its pool."""
+        connection_pool, self.connection_pool = self.connection_pool, None
+        if connection_pool is None or connection_pool.closed:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            connection_pool.putconn(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        """Schedule a health check for the next use of the connection."""
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None:
+            self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Close a persistent connection the server no longer answers."""
+        if self.connection is None or not self.health_check_enabled or \
+                self.health_check_done:
+            return
+
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        """Guarantee that a usable connection is established."""
+        self.close_if_health_check_failed()
+        super().ensure_connection()
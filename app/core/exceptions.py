@@ -0,0 +1,32 @@
+"""
+Exceptions for the API.
+"""
+from django.db import OperationalError
+from rest_framework import status, views
+from rest_framework.exceptions import APIException
+
+from core.db.backends.postgresql.base import PoolTimeout
+
+
+class Conflict(APIException):
+    """The request lost a race with a concurrent change."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The request conflicts with a concurrent change.'
+    default_code = 'conflict'
+
+
+class DatabaseBusy(APIException):
+    """No database connection was free in time."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The database is busy, retry in a moment.'
+    default_code = 'database_busy'
+    wait = 1
+
+
+def exception_handler(exc, context):
+    """Answer 503 instead of 500 when the connection pool ran dry."""
+    if isinstance(exc, OperationalError) and \
+            isinstance(exc.__cause__, PoolTimeout):
+        exc = DatabaseBusy()
+
+    return views.exception_handler(exc, context)
@@ -0,0 +1,69 @@
+"""
+Filter backends for the API.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+LIST_LOOKUPS = ('in', 'range')
+
+
+class LookupFilterBackend(BaseFilterBackend):
+    """
+    Filter on the field lookups a view declares in `filter_lookups`.
+
+    `filter_lookups = {'battery': ['gte', 'lte']}` accepts
+    `?battery__gte=20&battery__lte=80`, `exact` is spelled `?battery=20`.
+    `in` and `range` take comma separated values and choice fields accept
+    their labels as well as their values.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Return `queryset` filtered by the query parameters."""
+        lookups = getattr(view, 'filter_lookups', {})
+        filters = {}
+        errors = {}
+
+        for field_name, allowed in lookups.items():
+            model_field = queryset.model._meta.get_field(field_name)
+            for lookup in allowed:
+                param = field_name if lookup == 'exact' else \
+                    f'{field_name}__{lookup}'
+                if param not in request.query_params:
+                    continue
+                try:
+                    filters[param] = self.to_python(
+                        model_field,
+                        lookup,
+                        request.query_params[param],
+                    )
+                except DjangoValidationError as exc:
+                    errors[param] = exc.messages
+
+        if errors:
+            raise ValidationError(errors)
+
+        return queryset.filter(**filters)
+
+    def to_python(self, model_field, lookup, value):
+        """Convert a query parameter to the values of the lookup."""
+        if lookup not in LIST_LOOKUPS:
+            return self.to_field_value(model_field, value)
+
+        values = [
+            self.to_field_value(model_field, item.strip())
+            for item in value.split(',')
+        ]
+        if lookup == 'range' and len(values) != 2:
+            raise DjangoValidationError('Expected two comma separated values.')
+        return values
+
+    def to_field_value(self, model_field, value):
+        """Convert a single value, accepting the labels of choices."""
+        if model_field.choices:
+            for choice_value, label in model_field.choices:
+                if str(label).lower() == value.lower():
+                    return choice_value
+
+        return model_field.to_python(value)
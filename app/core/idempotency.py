@@ -0,0 +1,166 @@
+"""
+Replay responses of requests sent with an `Idempotency-Key` header.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.metrics import cache_requests
+from core.models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def request_fingerprint(request):
+    """Return a digest of the method, path and data of `request`."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(json.dumps(data, sort_keys=True, cls=JSONEncoder).encode())
+    return digest.hexdigest()
+
+
+def cache_key(user, key):
+    """Return the cache key of `key` for `user`."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'idempotency:{user.pk}:{digest}'
+
+
+def lock_key(user, key):
+    """Return the cache key reserving `key` for a request in progress."""
+    return f'{cache_key(user, key)}:lock'
+
+
+def get_stored_response(user, key):
+    """Return the stored response of `key`, if it has not expired."""
+    cache = caches[settings.IDEMPOTENCY_CACHE]
+    stored = cache.get(cache_key(user, key))
+    cache_requests.inc(
+        cache='idempotency',
+        result='miss' if stored is None else 'hit',
+    )
+    if stored is not None:
+        return stored
+
+    expires = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    stored = IdempotencyKey.objects.filter(
+        user=user,
+        key=key,
+        created_at__gt=expires,
+    ).values('fingerprint', 'status_code', 'response', 'created_at').first()
+    if stored is not None:
+        remaining = stored.pop('created_at') - expires
+        cache.set(
+            cache_key(user, key),
+            stored,
+            timeout=remaining.total_seconds(),
+        )
+
+    return stored
+
+
+def store_response(user, key, fingerprint, response):
+    """Store `response` for `key` in the database and the cache."""
+    stored = {
+        'fingerprint': fingerprint,
+        'status_code': response.status_code,
+        'response': json.loads(json.dumps(response.data, cls=JSONEncoder)),
+    }
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(
+                user=user,
+                key=key,
+                created_at__lte=timezone.now() - timedelta(
+                    seconds=settings.IDEMPOTENCY_KEY_TTL,
+                ),
+            ).delete()
+            IdempotencyKey.objects.create(user=user, key=key, **stored)
+    except IntegrityError:
+        # A concurrent request with the same key stored its response first.
+        return
+
+    caches[settings.IDEMPOTENCY_CACHE].set(
+        cache_key(user, key),
+        stored,
+        timeout=settings.IDEMPOTENCY_KEY_TTL,
+    )
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response of a view action retried with the same key.
+
+    Only responses the action returns are stored, errors raised as
+    exceptions and server errors leave the key free for a retry. A key
+    reused for a different request is rejected with a 422, and a retry
+    sent while the first request still runs with a 409.
+    """
+    @functools.wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_func(self, request, *args, **kwargs)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise ValidationError({
+                HEADER: f'Expected 1 to {MAX_KEY_LENGTH} characters.'
+            })
+
+        fingerprint = request_fingerprint(request)
+        stored = get_stored_response(request.user, key)
+        if stored is None:
+            cache = caches[settings.IDEMPOTENCY_CACHE]
+            lock = lock_key(request.user, key)
+            # Reserve the key so that a retry sent while this request runs
+            # does not run the action a second time.
+            if not cache.add(lock, True, settings.IDEMPOTENCY_LOCK_TTL):
+                response = Response(
+                    {'detail': f'A request with this {HEADER} is running.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+                response['Retry-After'] = '1'
+                return response
+            try:
+                # The request that held the key may have stored its
+                # response in the cache between the lookup and the
+                # reservation.
+                stored = cache.get(cache_key(request.user, key))
+                if stored is None:
+                    response = view_func(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        store_response(
+                            request.user,
+                            key,
+                            fingerprint,
+                            response,
+                        )
+                    return response
+            finally:
+                cache.delete(lock)
+
+        if stored['fingerprint'] != fingerprint:
+            return Response(
+                {'detail': f'The {HEADER} was used for another request.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(stored['response'], status=stored['status_code'])
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+    return wrapper
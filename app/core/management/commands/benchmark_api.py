@@ -0,0 +1,318 @@
+"""
+Django command to benchmark every API endpoint.
+"""
+import io
+import json
+import math
+import tempfile
+import time
+import tracemalloc
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Package, Robot
+from core.seeding import seed_fleet
+
+
+PASSWORD = 'benchmark-password'
+
+# Name: (method, URL, payload), the URL and payload are built from the
+# fixtures of the dataset. Writes are rolled back after every request.
+ENDPOINTS = {
+    'robot-list': ('get', lambda f: reverse('robot:robot-list'), None),
+    'robot-create': ('post', lambda f: reverse('robot:robot-list'), lambda f: {
+        'serial_number': 'BENCHNEW1',
+        'robot_model': Robot.ROBOT_MODEL.mw,
+    }),
+    'robot-detail': ('get', lambda f: reverse(
+        'robot:robot-detail',
+        args=[f['robot']],
+    ), None),
+    'robot-delete': ('delete', lambda f: reverse(
+        'robot:robot-detail',
+        args=[f['robot']],
+    ), None),
+    'robot-check-available': ('get', lambda f: reverse(
+        'robot:robot-check-available',
+    ), None),
+    'robot-fits': ('get', lambda f: reverse('robot:robot-fits'), lambda f: {
+        'weight': 10,
+    }),
+    'robot-export': ('get', lambda f: reverse('robot:robot-export'), None),
+    'robot-load-package': ('post', lambda f: reverse(
+        'robot:robot-load-package',
+        args=[f['robot']],
+    ), lambda f: {'packages': [f['package']]}),
+    'robot-load': ('post', lambda f: reverse('robot:robot-load'), lambda f: {
+        f['robot']: [f['package']],
+    }),
+    'robot-check-package': ('get', lambda f: reverse(
+        'robot:robot-check-package',
+        args=[f['loaded_robot']],
+    ), None),
+    'robot-check-battery': ('get', lambda f: reverse(
+        'robot:robot-check-battery',
+        args=[f['robot']],
+    ), None),
+    'package-list': ('get', lambda f: reverse('package:package-list'), None),
+    'package-create': ('post', lambda f: reverse(
+        'package:package-list',
+    ), lambda f: {'code': 'BENCH_NEW_1', 'name': 'Package-new', 'weight': 10}),
+    'package-detail': ('get', lambda f: reverse(
+        'package:package-detail',
+        args=[f['package']],
+    ), None),
+    'package-delete': ('delete', lambda f: reverse(
+        'package:package-detail',
+        args=[f['package']],
+    ), None),
+    'package-export': ('get', lambda f: reverse(
+        'package:package-export',
+    ), None),
+    'package-bulk-delete': ('post', lambda f: reverse(
+        'package:package-bulk-delete',
+    ), lambda f: {'codes': f['unloaded_packages']}),
+    'package-upload-image': ('post', lambda f: reverse(
+        'package:package-upload-image',
+        args=[f['package']],
+    ), lambda f: {'image': image_file()}),
+    'user-create': ('post', lambda f: reverse('user:create'), lambda f: {
+        'email': 'benchmark-new@example.com',
+        'password': PASSWORD,
+        'name': 'Benchmark',
+    }),
+    'user-token': ('post', lambda f: reverse('user:token'), lambda f: {
+        'email': f['email'],
+        'password': PASSWORD,
+    }),
+    'user-me': ('get', lambda f: reverse('user:me'), None),
+    'user-me-update': ('patch', lambda f: reverse('user:me'), lambda f: {
+        'name': 'Benchmark',
+    }),
+}
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'queries', 'alloc_kib']
+
+
+def image_file():
+    """Create and return a small JPEG upload."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(buffer, format='JPEG')
+    buffer.name = 'benchmark.jpg'
+    buffer.seek(0)
+
+    return buffer
+
+
+def percentile(values, q):
+    """Return the nearest-rank `q` percentile of `values`."""
+    values = sorted(values)
+
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def find_regressions(baseline, results, threshold, min_ms=0.5):
+    """
+    Return the metrics in `results` that regressed from `baseline`.
+
+    Latency and allocations regress when they grow by more than
+    `threshold`, latency also by more than `min_ms`. Query counts are
+    exact, so any increase is a regression.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric in METRICS:
+            old = baseline[key][metric]
+            new = metrics[metric]
+            if metric == 'queries':
+                regressed = new > old
+            else:
+                regressed = new > old * (1 + threshold)
+                if metric.endswith('_ms'):
+                    regressed = regressed and new - old > min_ms
+            if regressed:
+                regressions.append((key, metric, old, new))
+
+    return regressions
+
+
+class Command(BaseCommand):
+    """Django command to measure latency, queries and memory per endpoint."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            type=lambda value: [int(scale) for scale in value.split(',')],
+            default=[10, 1000],
+            help='Robots per user of each dataset, comma separated.',
+        )
+        parser.add_argument('--requests', type=int, default=30)
+        parser.add_argument(
+            '--endpoints',
+            nargs='*',
+            choices=sorted(ENDPOINTS),
+            default=list(ENDPOINTS),
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON.')
+        parser.add_argument(
+            '--compare',
+            help='Fail if a result regressed from this JSON baseline.',
+        )
+        parser.add_argument('--threshold', type=float, default=0.2)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if get_user_model().objects.filter(
+            email__startswith=f"fleet-{options['seed']}-",
+        ).exists():
+            raise CommandError(
+                f"A fleet with seed {options['seed']} already exists."
+            )
+
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            for scale in options['scales']:
+                self.run_scale(scale, options, results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'scales': options['scales'],
+                    'requests': options['requests'],
+                    'results': results,
+                }, f, indent=2)
+
+        if options['compare']:
+            self.compare(options['compare'], results, options['threshold'])
+
+    def run_scale(self, scale, options, results):
+        """Benchmark the endpoints on a dataset of `scale` robots."""
+        with transaction.atomic():
+            fixtures = self.create_dataset(scale, options['seed'])
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {fixtures['token']}",
+            )
+            for name in options['endpoints']:
+                key = f'{name}@{scale}'
+                results[key] = self.run_endpoint(
+                    client,
+                    name,
+                    fixtures,
+                    options['requests'],
+                )
+                self.stdout.write(f'{key:32} ' + ' '.join(
+                    f'{metric}={results[key][metric]}'
+                    for metric in METRICS
+                ))
+            transaction.set_rollback(True)
+
+    def create_dataset(self, scale, seed):
+        """Seed a user with `scale` robots and return the fixtures."""
+        user, = seed_fleet(1, scale, scale * 2, seed=seed)
+        user.set_password(PASSWORD)
+        user.save()
+
+        # The first robot is made idle and empty so it can be loaded.
+        robot = Robot.objects.filter(user=user).order_by('pk').first()
+        Robot.objects.filter(pk=robot.pk).update(
+            state=Robot.ROBOT_STATUS.idl,
+            weight_limit=Robot.ROBOT_WEIGHTS[robot.robot_model],
+        )
+        robot.packages.clear()
+        unloaded = list(Package.objects.filter(
+            user=user,
+            robotpackage__isnull=True,
+        ).order_by('pk').values_list('code', flat=True)[:50])
+        loaded_robot = Robot.objects.filter(
+            user=user,
+            packages__isnull=False,
+        ).order_by('pk').first() or robot
+
+        return {
+            'email': user.email,
+            'token': Token.objects.create(user=user).key,
+            'robot': robot.serial_number,
+            'loaded_robot': loaded_robot.serial_number,
+            'package': unloaded[0],
+            'unloaded_packages': unloaded,
+        }
+
+    def run_endpoint(self, client, name, fixtures, requests):
+        """Return the metrics of `requests` requests to endpoint `name`."""
+        method, url, data = ENDPOINTS[name]
+        url = url(fixtures)
+
+        def request():
+            with transaction.atomic():
+                payload = data(fixtures) if data else None
+                kwargs = {}
+                if method != 'get':
+                    kwargs['format'] = (
+                        'multipart' if name == 'package-upload-image'
+                        else 'json'
+                    )
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    res = getattr(client, method)(url, payload, **kwargs)
+                    if res.streaming:
+                        b''.join(res.streaming_content)
+                    elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+
+            if res.status_code >= 400:
+                raise CommandError(
+                    f'{name} returned {res.status_code}: {res.content[:200]}'
+                )
+
+            return elapsed, len(queries)
+
+        request()
+        timings = []
+        for _ in range(requests):
+            elapsed, queries = request()
+            timings.append(elapsed * 1000)
+
+        # Tracing slows requests down, so memory is measured separately.
+        tracemalloc.start()
+        try:
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries': queries,
+            'alloc_kib': round(peak / 1024, 1),
+        }
+
+    def compare(self, path, results, threshold):
+        """Fail if any of `results` regressed from the baseline in `path`."""
+        with open(path) as f:
+            baseline = json.load(f)['results']
+
+        regressions = find_regressions(baseline, results, threshold)
+        for key, metric, old, new in regressions:
+            self.stderr.write(f'{key} {metric}: {old} -> {new}')
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} metrics regressed beyond {threshold:.0%}.'
+            )
+
+        self.stdout.write(f'No regressions beyond {threshold:.0%}.')
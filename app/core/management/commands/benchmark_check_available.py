@@ -0,0 +1,73 @@
+"""
+Django command to benchmark check_available on a large fleet.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import create_tenant_fleets
+from core.models import Robot
+
+
+class Command(BaseCommand):
+    """Django command to time check_available for one tenant of many."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--robots', type=int, default=1_000_000)
+        parser.add_argument('--tenants', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--min-capacity', type=int, default=400)
+        parser.add_argument('--min-battery', type=int, default=50)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        url = reverse('robot:robot-check-available')
+        params = {
+            'min_capacity': options['min_capacity'],
+            'min_battery': options['min_battery'],
+        }
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            users = create_tenant_fleets(
+                options['tenants'],
+                options['robots'],
+            )
+            self.stdout.write(
+                f"created robots={options['robots']} "
+                f"tenants={options['tenants']} "
+                f'seconds={time.perf_counter() - start:.1f}'
+            )
+
+            user = users[0]
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            timings = []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                res = client.get(url, params)
+                timings.append(time.perf_counter() - start)
+            count = len(res.json())
+
+            plan = Robot.objects.filter(
+                user=user,
+                state__in=[Robot.ROBOT_STATUS.idl, Robot.ROBOT_STATUS.ldg],
+                weight_limit__gte=params['min_capacity'],
+                battery__gte=params['min_battery'],
+            ).explain()
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        self.stdout.write(
+            f'status={res.status_code} robots={count} '
+            f'p50={statistics.median(timings) * 1000:.2f}ms '
+            f'max={max(timings) * 1000:.2f}ms'
+        )
+        connection.close()
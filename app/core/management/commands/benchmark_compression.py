@@ -0,0 +1,67 @@
+"""
+Django command to benchmark response compression.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.benchmarks import create_benchmark_user, create_fleet
+from core.compression import COMPRESSORS, compress
+
+
+ENDPOINTS = ['robot:robot-list', 'package:package-list']
+
+
+class Command(BaseCommand):
+    """Django command to report bytes on the wire and CPU per request."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--robots', type=int, default=500)
+        parser.add_argument('--packages-per-robot', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            user = create_benchmark_user()
+            create_fleet(
+                user,
+                options['robots'],
+                options['packages_per_robot'],
+            )
+            client = APIClient()
+            client.force_authenticate(user)
+
+            for endpoint in ENDPOINTS:
+                url = reverse(endpoint)
+                for encoding in ['identity', *COMPRESSORS]:
+                    self.measure(client, url, encoding, options['repeat'])
+
+            transaction.set_rollback(True)
+
+    def measure(self, client, url, encoding, repeat):
+        """Request `url` with `encoding` and write the averages."""
+        start = time.process_time()
+        for _ in range(repeat):
+            res = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        cpu = (time.process_time() - start) / repeat
+
+        compress_cpu = 0.0
+        if encoding in COMPRESSORS:
+            body = client.get(url, HTTP_ACCEPT_ENCODING='identity').content
+            start = time.process_time()
+            for _ in range(repeat):
+                compress(encoding, body)
+            compress_cpu = (time.process_time() - start) / repeat
+
+        self.stdout.write(
+            f'{url:16} {encoding:8} '
+            f"encoding={res.get('Content-Encoding', 'identity'):8} "
+            f'bytes={len(res.content):7} cpu={cpu * 1000:7.2f}ms '
+            f'compress_cpu={compress_cpu * 1000:6.2f}ms'
+        )
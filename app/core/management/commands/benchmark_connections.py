@@ -0,0 +1,118 @@
+"""
+Django command to benchmark database connection handling.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import create_benchmark_user, create_fleet
+
+
+CONNECTION_MODES = {
+    'new-connection': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_MAX_SIZE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL_MAX_SIZE': '0'},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_MAX_SIZE': None},
+}
+
+
+class Command(BaseCommand):
+    """Django command to measure requests per second on check_available."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--robots', type=int, default=50)
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Run once per connection mode in a child process.',
+        )
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['compare']:
+            return self.compare(options)
+
+        user = create_benchmark_user()
+        try:
+            create_fleet(user, options['robots'])
+            token = Token.objects.create(user=user)
+            elapsed = self.run_threads(token.key, options)
+        finally:
+            user.delete()
+
+        total = options['threads'] * options['requests']
+        settings_dict = connections['default'].settings_dict
+        self.stdout.write(
+            f"conn_max_age={settings_dict['CONN_MAX_AGE']} "
+            f"pool={settings_dict.get('POOL')} "
+            f'requests={total} seconds={elapsed:.2f} '
+            f'rps={total / elapsed:.1f}'
+        )
+
+    def run_threads(self, token, options):
+        """Hit the endpoint from every thread and return the elapsed time."""
+        url = reverse('robot:robot-check-available')
+        errors = []
+
+        def worker():
+            client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+            try:
+                for _ in range(options['requests']):
+                    # The test client skips the connection lifecycle of the
+                    # request handler, so it is replayed here.
+                    close_old_connections()
+                    res = client.get(url)
+                    close_old_connections()
+                    if res.status_code != 200:
+                        errors.append(res.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['threads'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if errors:
+            self.stderr.write(f'{len(errors)} requests failed: {errors[:5]}')
+
+        return elapsed
+
+    def compare(self, options):
+        """Run the benchmark in a child process for each mode."""
+        for mode, env in CONNECTION_MODES.items():
+            child_env = {
+                **os.environ,
+                **{k: v or str(options['threads']) for k, v in env.items()},
+            }
+            result = subprocess.run(
+                [
+                    sys.executable, sys.argv[0], 'benchmark_connections',
+                    '--threads', str(options['threads']),
+                    '--requests', str(options['requests']),
+                    '--robots', str(options['robots']),
+                ],
+                env=child_env,
+                capture_output=True,
+                text=True,
+            )
+            self.stdout.write(f'{mode}: {result.stdout.strip()}')
+            if result.returncode:
+                self.stderr.write(result.stderr)
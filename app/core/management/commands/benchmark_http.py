@@ -0,0 +1,166 @@
+"""
+Django command to load test the API over HTTP.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import create_benchmark_user, create_fleet
+
+
+ENDPOINT = '/api/robot/check_available/'
+
+SERVING_MODES = {
+    'runserver': {
+        'command': ['manage.py', 'runserver', '--noreload'],
+        'env': {'DEBUG': '1'},
+    },
+    'gunicorn': {
+        'command': ['-m', 'gunicorn', 'app.wsgi:application'],
+        'env': {'DEBUG': '0'},
+    },
+}
+
+
+def load_test(url, token, concurrency, requests):
+    """Hit `url` from `concurrency` threads and return the timings."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(requests):
+            request = urllib.request.Request(
+                url,
+                headers={'Authorization': f'Token {token}'},
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as res:
+                    res.read()
+            except (urllib.error.URLError, ConnectionError) as exc:
+                with lock:
+                    errors.append(exc)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return time.perf_counter() - start, latencies, errors
+
+
+def wait_for_server(url, timeout=30):
+    """Wait until something answers on `url`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url)
+            return
+        except urllib.error.HTTPError:
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+
+    raise TimeoutError(f'Server on {url} did not start.')
+
+
+class Command(BaseCommand):
+    """Django command to compare requests per second of serving modes."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default=f'http://127.0.0.1:8000{ENDPOINT}',
+            help='Endpoint to load test against a running server.',
+        )
+        parser.add_argument('--token', help='API token for `--url`.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Start runserver and gunicorn locally and test both.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not options['compare']:
+            return self.report(options['url'], options['url'], *load_test(
+                options['url'],
+                options['token'],
+                options['concurrency'],
+                options['requests'],
+            ))
+
+        user = create_benchmark_user()
+        try:
+            create_fleet(user, 50)
+            token = Token.objects.create(user=user)
+            for port, (mode, config) in enumerate(
+                SERVING_MODES.items(),
+                start=8101,
+            ):
+                self.compare_mode(mode, config, port, token.key, options)
+        finally:
+            user.delete()
+
+    def compare_mode(self, mode, config, port, token, options):
+        """Start the server for `mode` and load test it."""
+        env = {
+            **os.environ,
+            **config['env'],
+            'PORT': str(port),
+            'ALLOWED_HOSTS': '127.0.0.1',
+        }
+        command = [sys.executable, *config['command']]
+        if mode == 'runserver':
+            command.append(f'127.0.0.1:{port}')
+
+        server = subprocess.Popen(
+            command,
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{port}{ENDPOINT}'
+        try:
+            wait_for_server(url)
+            self.report(mode, url, *load_test(
+                url,
+                token,
+                options['concurrency'],
+                options['requests'],
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+
+    def report(self, mode, url, elapsed, latencies, errors):
+        """Write the results of a load test."""
+        if len(latencies) < 2:
+            self.stderr.write(f'{mode}: {len(errors)} requests failed.')
+            return
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{mode}: requests={len(latencies)} errors={len(errors)} '
+            f'rps={len(latencies) / elapsed:.1f} '
+            f'p50={quantiles[49] * 1000:.1f}ms '
+            f'p95={quantiles[94] * 1000:.1f}ms'
+        )
@@ -0,0 +1,79 @@
+"""
+Django command to benchmark the joins over robots, packages and their
+through table.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.benchmarks import create_benchmark_user, create_fleet
+from core.models import Package, Robot
+
+
+INDEXED_TABLES = ['core_robot', 'core_package', 'core_robot_packages']
+
+
+class Command(BaseCommand):
+    """Django command to time join heavy queries and report index sizes."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--robots', type=int, default=5000)
+        parser.add_argument('--packages-per-robot', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            user = create_benchmark_user()
+            create_fleet(
+                user,
+                options['robots'],
+                options['packages_per_robot'],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {', '.join(INDEXED_TABLES)}")
+
+            queries = {
+                'robots-with-packages': lambda: list(
+                    Robot.objects.filter(user=user).prefetch_related(
+                        'packages'
+                    )
+                ),
+                'packages-with-robot': lambda: list(
+                    Package.objects.filter(user=user).values(
+                        'code',
+                        'robot__serial_number',
+                    )
+                ),
+                'packages-per-robot': lambda: list(
+                    Robot.objects.filter(user=user).annotate(
+                        loaded=Count('packages'),
+                    ).values('serial_number', 'loaded')
+                ),
+            }
+            for name, query in queries.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    query()
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f'{name:22} '
+                    f'p50={statistics.median(timings) * 1000:8.2f}ms'
+                )
+
+            with connection.cursor() as cursor:
+                for table in INDEXED_TABLES:
+                    cursor.execute(
+                        'SELECT pg_size_pretty(pg_indexes_size(%s)), '
+                        'pg_size_pretty(pg_table_size(%s))',
+                        [table, table],
+                    )
+                    indexes, heap = cursor.fetchone()
+                    self.stdout.write(
+                        f'{table:22} indexes={indexes} table={heap}'
+                    )
+            transaction.set_rollback(True)
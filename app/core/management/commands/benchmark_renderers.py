@@ -0,0 +1,80 @@
+"""
+Django command to benchmark the API renderers.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.benchmarks import create_benchmark_user, create_fleet
+from core.models import Package, Robot
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from package.serializers import PackageSerializer
+from robot.serializers import RobotDetailSerializer, RobotSerializer
+
+
+RENDERERS = {
+    'json': JSONRenderer(),
+    'orjson': ORJSONRenderer(),
+    'msgpack': MessagePackRenderer(),
+}
+
+
+class Command(BaseCommand):
+    """Django command to report encode time and payload size."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--robots', type=int, default=500)
+        parser.add_argument('--packages-per-robot', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            user = create_benchmark_user()
+            create_fleet(
+                user,
+                options['robots'],
+                options['packages_per_robot'],
+            )
+            request = Request(APIRequestFactory().get('/'))
+            context = {'request': request}
+            robots = Robot.objects.filter(user=user).prefetch_related(
+                'packages'
+            )
+            payloads = {
+                'robot-list': RobotSerializer(
+                    robots,
+                    many=True,
+                    context=context,
+                ).data,
+                'robot-detail': RobotDetailSerializer(
+                    robots,
+                    many=True,
+                    context=context,
+                ).data,
+                'package-list': PackageSerializer(
+                    Package.objects.filter(user=user),
+                    many=True,
+                    context=context,
+                ).data,
+            }
+            transaction.set_rollback(True)
+
+        for endpoint, data in payloads.items():
+            for name, renderer in RENDERERS.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    content = renderer.render(data)
+                    timings.append(time.perf_counter() - start)
+
+                self.stdout.write(
+                    f'{endpoint:14} {name:8} '
+                    f'encode={statistics.median(timings) * 1000:8.2f}ms '
+                    f'bytes={len(content)}'
+                )
@@ -0,0 +1,97 @@
+"""
+Django command to benchmark small tenants next to a large one.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import create_tenant_fleets
+from core.partitioning import partition_by_user
+
+
+class Command(BaseCommand):
+    """Django command to time fits for a large and many small tenants."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--large-robots', type=int, default=500_000)
+        parser.add_argument('--small-tenants', type=int, default=1000)
+        parser.add_argument('--small-robots', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--weight', type=int, default=200)
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            default=0,
+            help='Hash partition by user before seeding, 0 to skip.',
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Run unpartitioned and with `--partitions` partitions.',
+        )
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        runs = [options['partitions']]
+        if options['compare']:
+            runs = [0, options['partitions'] or 16]
+
+        for partitions in runs:
+            with transaction.atomic():
+                self.run(partitions, options)
+                transaction.set_rollback(True)
+
+        connection.close()
+
+    def run(self, partitions, options):
+        """Seed the tenants, time their requests and write the results."""
+        if partitions:
+            partition_by_user(connection, partitions)
+
+        large = create_tenant_fleets(1, options['large_robots'])
+        small = create_tenant_fleets(
+            options['small_tenants'],
+            options['small_tenants'] * options['small_robots'],
+        )
+
+        timings = {
+            'large': self.time_tenant(large[0], options),
+            # Sample a spread of small tenants rather than all of them.
+            'small': [
+                timing
+                for user in small[::max(len(small) // 10, 1)]
+                for timing in self.time_tenant(user, options)
+            ],
+        }
+
+        medians = {
+            tenant: statistics.median(values) * 1000
+            for tenant, values in timings.items()
+        }
+        self.stdout.write(
+            f'partitions={partitions} '
+            f"small_p50={medians['small']:.2f}ms "
+            f"large_p50={medians['large']:.2f}ms "
+            f"spread={medians['large'] / medians['small']:.2f}x"
+        )
+
+    def time_tenant(self, user, options):
+        """Return the timings of fits requests made as `user`."""
+        token = Token.objects.create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        url = reverse('robot:robot-fits')
+
+        timings = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            client.get(url, {'weight': options['weight']})
+            timings.append(time.perf_counter() - start)
+
+        return timings
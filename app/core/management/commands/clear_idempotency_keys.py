@@ -0,0 +1,23 @@
+"""
+Django command to delete expired idempotency keys.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Django command to delete keys older than `IDEMPOTENCY_KEY_TTL`."""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lte=timezone.now() - timedelta(
+                seconds=settings.IDEMPOTENCY_KEY_TTL,
+            ),
+        ).delete()
+        self.stdout.write(f'Deleted {deleted} expired idempotency keys.')
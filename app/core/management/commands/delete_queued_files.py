@@ -0,0 +1,34 @@
+"""
+Django command to remove files queued by bulk deletes.
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import QueuedFileDeletion
+
+
+class Command(BaseCommand):
+    """Django command to remove queued files in batches."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted = 0
+        while True:
+            batch = list(QueuedFileDeletion.objects.order_by('id').values_list(
+                'id',
+                'name',
+            )[:options['batch_size']])
+            if not batch:
+                break
+
+            for _, name in batch:
+                default_storage.delete(name)
+            QueuedFileDeletion.objects.filter(
+                id__in=[pk for pk, _ in batch],
+            ).delete()
+            deleted += len(batch)
+
+        self.stdout.write(f'Deleted {deleted} queued files.')
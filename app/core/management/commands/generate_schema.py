@@ -0,0 +1,41 @@
+"""
+Django command to precompute the OpenAPI schema.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.schema import read_schema_meta, schema_fingerprint, write_schema
+
+
+class Command(BaseCommand):
+    """Django command to generate the schema served at `api/schema/`."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate even if the URLconf and serializers did not '
+                 'change.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not settings.ENABLE_API_DOCS:
+            self.stdout.write('API docs are disabled, no schema generated.')
+            return
+
+        root = settings.API_SCHEMA_ROOT
+        fingerprint = schema_fingerprint()
+        meta = read_schema_meta(root)
+
+        if not options['force'] and meta is not None and \
+                meta['fingerprint'] == fingerprint:
+            self.stdout.write('Schema is up to date.')
+            return
+
+        meta = write_schema(root, fingerprint)
+        etags = ', '.join(
+            f"{schema_format}={info['etag']}"
+            for schema_format, info in meta['formats'].items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Schema generated: {etags}'))
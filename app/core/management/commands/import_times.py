@@ -0,0 +1,130 @@
+"""
+Django command to report the import time of the project.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+IMPORT_TIME_LINE = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$'
+)
+
+BOOT_TARGETS = {
+    'manage': (
+        'import django\n'
+        'from django.core.handlers.wsgi import WSGIHandler\n'
+        'django.setup()\n'
+        'application = WSGIHandler()\n'
+    ),
+    'wsgi': 'from app.wsgi import application\n',
+}
+
+BOOT_SCRIPT = '''
+import io
+import json
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+start = time.perf_counter()
+{target}
+booted = time.perf_counter()
+environ = {{
+    'REQUEST_METHOD': 'GET',
+    'PATH_INFO': {path!r},
+    'SERVER_NAME': '127.0.0.1',
+    'SERVER_PORT': '80',
+    'wsgi.input': io.BytesIO(),
+    'wsgi.url_scheme': 'http',
+}}
+b''.join(application(environ, lambda status, headers: None))
+served = time.perf_counter()
+
+print(json.dumps({{
+    'boot': booted - start,
+    'first_request': served - booted,
+}}))
+'''
+
+
+def parse_import_times(lines):
+    """Return `(module, self, cumulative)` microseconds per import."""
+    imports = []
+    for line in lines:
+        match = IMPORT_TIME_LINE.match(line.rstrip('\n'))
+        if match:
+            imports.append((
+                match.group(4),
+                int(match.group(1)),
+                int(match.group(2)),
+            ))
+
+    return imports
+
+
+class Command(BaseCommand):
+    """Django command to measure boot and first request time."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            choices=BOOT_TARGETS,
+            default='wsgi',
+            help='Boot like `manage.py` or like `app/wsgi.py`.',
+        )
+        parser.add_argument('--path', default='/api/robot/')
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        script = BOOT_SCRIPT.format(
+            target=BOOT_TARGETS[options['target']],
+            path=options['path'],
+        )
+        allowed_hosts = os.environ.get('ALLOWED_HOSTS', '')
+        env = {**os.environ, 'ALLOWED_HOSTS': f'{allowed_hosts},127.0.0.1'}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr)
+            return
+
+        timings = json.loads(result.stdout.splitlines()[-1])
+        imports = parse_import_times(result.stderr.splitlines())
+
+        self.stdout.write(
+            f"boot={timings['boot'] * 1000:.1f}ms "
+            f"first_request={timings['first_request'] * 1000:.1f}ms "
+            f"time_to_first_request="
+            f"{(timings['boot'] + timings['first_request']) * 1000:.1f}ms "
+            f'modules={len(imports)}'
+        )
+
+        packages = Counter()
+        for module, self_us, _ in imports:
+            packages[module.split('.')[0]] += self_us
+
+        self.stdout.write('\nSelf time per top-level package:')
+        for package, self_us in packages.most_common(options['top']):
+            self.stdout.write(f'{self_us / 1000:10.1f}ms  {package}')
+
+        self.stdout.write('\nSlowest modules (self time, cumulative):')
+        slowest = sorted(imports, key=lambda i: i[1], reverse=True)
+        for module, self_us, cumulative_us in slowest[:options['top']]:
+            self.stdout.write(
+                f'{self_us / 1000:10.1f}ms {cumulative_us / 1000:10.1f}ms  '
+                f'{module}'
+            )
@@ -0,0 +1,24 @@
+"""
+Django command to partition the tenant tables by user.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.partitioning import PARTITIONED_TABLES, partition_by_user
+
+
+class Command(BaseCommand):
+    """Django command to hash partition robots and packages by user."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=16)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            partition_by_user(connection, options['partitions'])
+
+        self.stdout.write(
+            f"Partitioned {', '.join(PARTITIONED_TABLES)} into "
+            f"{options['partitions']} partitions."
+        )
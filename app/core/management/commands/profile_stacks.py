@@ -0,0 +1,55 @@
+"""
+Django command to aggregate request profiles into collapsed stacks.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import collapse_profiles, profile_endpoint
+
+
+class Command(BaseCommand):
+    """Django command to write flamegraph input from stored profiles."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoint',
+            help='Only aggregate profiles of this view and action, '
+                 'e.g. RobotViewSet.load_package.',
+        )
+        parser.add_argument('--output', help='File to write, default stdout.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        endpoints = {}
+        if os.path.isdir(settings.PROFILING_ROOT):
+            for name in sorted(os.listdir(settings.PROFILING_ROOT)):
+                if name.endswith('.prof'):
+                    endpoints.setdefault(profile_endpoint(name), []).append(
+                        os.path.join(settings.PROFILING_ROOT, name)
+                    )
+        if options['endpoint']:
+            endpoints = {
+                endpoint: paths for endpoint, paths in endpoints.items()
+                if endpoint == options['endpoint']
+            }
+
+        # The endpoint is the root frame, so one flamegraph can hold all.
+        lines = [
+            f'{endpoint};{stack} {value}'
+            for endpoint, paths in sorted(endpoints.items())
+            for stack, value in sorted(collapse_profiles(paths).items())
+        ]
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.writelines(f'{line}\n' for line in lines)
+        else:
+            for line in lines:
+                self.stdout.write(line)
+
+        self.stderr.write(
+            f'Aggregated {sum(map(len, endpoints.values()))} profiles of '
+            f'{len(endpoints)} endpoints.'
+        )
@@ -0,0 +1,54 @@
+"""
+Django command to generate a synthetic fleet for load testing.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import seed_fleet
+
+
+class Command(BaseCommand):
+    """Django command to seed users with robots and packages."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--robots-per-user', type=int, default=100)
+        parser.add_argument('--packages-per-user', type=int, default=200)
+        parser.add_argument(
+            '--loaded-ratio',
+            type=float,
+            default=0.3,
+            help='Share of packages loaded on a robot.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not 0 <= options['loaded_ratio'] <= 1:
+            raise CommandError('--loaded-ratio must be between 0 and 1.')
+        if get_user_model().objects.filter(
+            email__startswith=f"fleet-{options['seed']}-",
+        ).exists():
+            raise CommandError(
+                f"A fleet with seed {options['seed']} already exists."
+            )
+
+        start = time.perf_counter()
+        users = seed_fleet(
+            options['users'],
+            options['robots_per_user'],
+            options['packages_per_user'],
+            options['loaded_ratio'],
+            options['seed'],
+            options['chunk_size'],
+        )
+
+        self.stdout.write(
+            f'Seeded users={len(users)} '
+            f"robots={len(users) * options['robots_per_user']} "
+            f"packages={len(users) * options['packages_per_user']} "
+            f'seconds={time.perf_counter() - start:.1f}'
+        )
@@ -0,0 +1,343 @@
+"""
+Metrics in the Prometheus text format.
+"""
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from core.models import Package, Robot, RobotPackage
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def format_labels(labelnames, values, **extra):
+    """Return the `{name="value",...}` part of a sample."""
+    labels = [*zip(labelnames, values), *extra.items()]
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in labels
+    )
+
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value):
+    """Return a sample value as Prometheus expects it."""
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value))
+
+
+class Counter:
+    """Value that only goes up, per combination of labels."""
+    type = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = registry.lock
+        self._values = {}
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        """Add `amount` to the value of `labels`."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dump(self):
+        """Return the values as a JSON compatible list."""
+        return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(current, value):
+        """Combine the values of two processes."""
+        return (current or 0) + value
+
+    def samples(self, values):
+        """Yield the lines of `values`."""
+        for key, value in sorted(values.items()):
+            labels = format_labels(self.labelnames, key)
+            yield f'{self.name}_total{labels} {format_value(value)}'
+
+
+class Histogram(Counter):
+    """Count of observations per bucket, with their sum."""
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = (*buckets, float('inf'))
+        super().__init__(registry, name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        """Count `value` in its bucket for `labels`."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    @staticmethod
+    def merge(current, value):
+        """Combine the values of two processes."""
+        if current is None:
+            return list(value)
+
+        return [a + b for a, b in zip(current, value)]
+
+    def samples(self, values):
+        """Yield the cumulative bucket, sum and count lines of `values`."""
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = format_labels(
+                    self.labelnames,
+                    key,
+                    le=format_value(bound),
+                )
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {format_value(counts[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    """
+    Metrics of this process, aggregated with other processes on a scrape.
+
+    With `METRICS_DIR` set, every process writes its values to its own
+    file in that directory, every `METRICS_FLUSH_SECONDS` from a thread
+    and once more when it exits, and a scrape sums the files of all
+    processes. The file of an exited process is merged into the archive
+    file, so counters do not go back when a worker is replaced.
+    """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric):
+        """Add `metric` to the registry."""
+        self.metrics[metric.name] = metric
+
+    def dump(self):
+        """Return the values of every metric as JSON compatible data."""
+        with self.lock:
+            return {
+                name: metric.dump() for name, metric in self.metrics.items()
+            }
+
+    def flush(self):
+        """Write the values of this process to `METRICS_DIR`."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        self._write(path, self.dump())
+
+    def start_flushing(self):
+        """Flush every `METRICS_FLUSH_SECONDS` from a daemon thread."""
+        if not settings.METRICS_DIR:
+            return
+
+        def run():
+            while True:
+                time.sleep(settings.METRICS_FLUSH_SECONDS)
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception('Could not flush the metrics.')
+
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+
+    def archive(self, pid):
+        """Merge the file of the exited process `pid` into the archive."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        path = os.path.join(directory, f'{pid}.json')
+        dump = self._read(path)
+        if dump is None:
+            return
+
+        archive = os.path.join(directory, self.ARCHIVE)
+        with self._directory_lock(fcntl.LOCK_EX):
+            values = self._merge([self._read(archive) or {}, dump])
+            self._write(archive, {
+                name: [[list(key), value] for key, value in samples.items()]
+                for name, samples in values.items()
+            })
+            os.remove(path)
+
+    def collect(self):
+        """Return the values of each metric summed over the processes."""
+        if not settings.METRICS_DIR:
+            return self._merge([self.dump()])
+
+        self.flush()
+        pattern = os.path.join(settings.METRICS_DIR, '*.json')
+        # A file is not read both before and after it is archived.
+        with self._directory_lock(fcntl.LOCK_SH):
+            dumps = [self._read(path) for path in glob.glob(pattern)]
+
+        return self._merge([dump for dump in dumps if dump is not None])
+
+    def _merge(self, dumps):
+        values = {name: {} for name in self.metrics}
+        for dump in dumps:
+            for name, samples in dump.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in samples:
+                    key = tuple(key)
+                    values[name][key] = metric.merge(
+                        values[name].get(key),
+                        value,
+                    )
+
+        return values
+
+    @contextmanager
+    def _directory_lock(self, operation):
+        path = os.path.join(settings.METRICS_DIR, '.lock')
+        with open(path, 'a') as f:
+            fcntl.flock(f, operation)
+            yield
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path, dump):
+        # Every thread writes its own temporary file, replaced atomically.
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with self._flush_lock:
+            with open(temporary, 'w') as f:
+                json.dump(dump, f)
+            os.replace(temporary, path)
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.samples(values))
+
+        return lines
+
+
+registry = Registry()
+
+request_duration = Histogram(
+    registry,
+    'api_request_duration_seconds',
+    'Time to answer API requests.',
+    ['view', 'action', 'method', 'status'],
+)
+db_queries = Counter(
+    registry,
+    'api_db_queries',
+    'Database queries made by API requests.',
+    ['view', 'action'],
+)
+cache_requests = Counter(
+    registry,
+    'cache_requests',
+    'Lookups in the caches of the API.',
+    ['cache', 'result'],
+)
+
+
+def fleet_stats():
+    """Return the counts, battery and loaded weight of the robots."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT state, count(*), coalesce(sum(battery), 0), (
+                SELECT coalesce(sum(package.weight), 0)
+                FROM {RobotPackage._meta.db_table} AS loaded
+                JOIN {Package._meta.db_table} AS package
+                    ON package.id = loaded.package_id
+            )
+            FROM {Robot._meta.db_table}
+            GROUP BY state
+            """
+        )
+        rows = cursor.fetchall()
+
+    robots = {state: 0 for state, _ in Robot.ROBOT_STATUS}
+    battery = loaded_weight = 0
+    for state, count, state_battery, loaded_weight in rows:
+        robots[state] = count
+        battery += state_battery
+    total = sum(robots.values())
+
+    return {
+        'robots': robots,
+        'battery': battery / total if total else 0,
+        'loaded_weight': loaded_weight,
+    }
+
+
+def render_fleet():
+    """Return the fleet gauges, computed at most every few seconds."""
+    stats = cache.get_or_set(
+        'metrics:fleet',
+        fleet_stats,
+        settings.METRICS_FLEET_TTL,
+    )
+    states = {state: str(label) for state, label in Robot.ROBOT_STATUS}
+    lines = [
+        '# HELP fleet_robots Robots per state.',
+        '# TYPE fleet_robots gauge',
+    ]
+    for state, count in sorted(stats['robots'].items()):
+        lines.append(
+            f'fleet_robots{format_labels(["state"], [states[state]])} '
+            f'{format_value(count)}'
+        )
+    lines += [
+        '# HELP fleet_battery_average Average battery level of the robots.',
+        '# TYPE fleet_battery_average gauge',
+        f"fleet_battery_average {format_value(stats['battery'])}",
+        '# HELP fleet_loaded_weight Weight of the packages on robots.',
+        '# TYPE fleet_loaded_weight gauge',
+        f"fleet_loaded_weight {format_value(stats['loaded_weight'])}",
+    ]
+
+    return lines
@@ -0,0 +1,415 @@
+"""
+Middlewares for the API.
+"""
+import hashlib
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from core.compression import COMPRESSORS, compress, compress_stream
+from core.metrics import db_queries, request_duration
+from core.routers import has_written, pin_primary, record_write, \
+    unpin_primary
+from core.timing import RequestQueries, RequestTiming, slow_query_log
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_action(view_func, request):
+    """
+    Return the class and action of a REST framework view, or None.
+
+    The action of a viewset is the one routed for the method, other API
+    views are handled by the method itself.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return None
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+
+    return view_class, actions.get(method, method)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pin the reads of unsafe requests to the primary database.
+
+    A response to a request that wrote pins the client for a few seconds,
+    so the reads that it makes right after also go to the primary while
+    the replicas catch up. Clients sending an `Authorization` header are
+    pinned by a cache entry for their credentials, since token clients
+    rarely keep cookies, others by a short-lived cookie. Only writes set
+    the pin, reads of a pinned client do not extend it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self.pin_key(request)
+        unpin_primary()
+        if request.method not in SAFE_METHODS:
+            record_write()
+        elif self.is_pinned(request, key):
+            pin_primary()
+
+        try:
+            response = self.get_response(request)
+            if has_written() and settings.DATABASE_REPLICAS:
+                self.pin(response, key)
+        finally:
+            unpin_primary()
+
+        return response
+
+    def pin(self, response, key):
+        """Pin the client of `response` for the next few seconds."""
+        if key is not None:
+            caches[settings.DATABASE_REPLICA_PIN_CACHE].set(
+                key,
+                True,
+                settings.DATABASE_REPLICA_PIN_SECONDS,
+            )
+        else:
+            response.set_cookie(
+                settings.DATABASE_REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+
+    def pin_key(self, request):
+        """Return the cache key pinning the credentials of `request`."""
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if not credentials:
+            return None
+        digest = hashlib.sha256(credentials.encode()).hexdigest()
+
+        return f'pin_primary:{digest}'
+
+    def is_pinned(self, request, key):
+        """Return whether the client of `request` wrote a moment ago."""
+        if settings.DATABASE_REPLICA_PIN_COOKIE in request.COOKIES:
+            return True
+        if key is None or not settings.DATABASE_REPLICAS:
+            return False
+
+        return caches[settings.DATABASE_REPLICA_PIN_CACHE].get(key, False)
+
+
+def parse_accept_encoding(header):
+    """Return the quality value of each coding in `Accept-Encoding`."""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            codings[coding.strip().lower()] = quality
+
+    return codings
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with zstd, brotli or gzip.
+
+    The coding is negotiated from `Accept-Encoding` among
+    `COMPRESSION_ENCODINGS`, in that order of preference on equal quality.
+    Responses smaller than `COMPRESSION_MIN_SIZE` are sent as they are and
+    streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('Content-Encoding') or \
+                not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoding,
+                response.streaming_content,
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            content = compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+
+        return response
+
+    def is_compressible(self, response):
+        """Return whether the content type of `response` compresses well."""
+        content_type = response.get('Content-Type', '').split(';')[0]
+        return any(
+            content_type.startswith(prefix)
+            for prefix in settings.COMPRESSION_CONTENT_TYPES
+        )
+
+    def negotiate(self, header):
+        """Return the best coding accepted by the client, if any."""
+        accepted = parse_accept_encoding(header)
+        wildcard = accepted.get('*', 0.0)
+        best, best_quality = None, 0.0
+        for encoding in settings.COMPRESSION_ENCODINGS:
+            if encoding not in COMPRESSORS:
+                continue
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        return best
+
+
+class FinishedStream:
+    """
+    Streaming body calling `callback` once, when it is exhausted or closed
+    by the server, whichever comes first.
+    """
+
+    def __init__(self, content, callback):
+        self._content = iter(content)
+        self._callback = callback
+        self._finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._finished:
+            self._finished = True
+            self._callback()
+
+
+class RequestQueriesMiddleware:
+    """
+    Count the queries of every request in `request.queries`.
+
+    One execute wrapper is installed on the connections for the request
+    and kept until the response is sent, which for a streaming response is
+    once its body is, so queries made while it streams are counted. The
+    middlewares inside this one read the count from `request.queries` and
+    act on it in its `on_finish` callbacks.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = request.queries = RequestQueries()
+        stack = ExitStack()
+        try:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+
+        def finish():
+            stack.close()
+            queries.finish(response)
+
+        if response.streaming:
+            response.streaming_content = FinishedStream(
+                response.streaming_content,
+                finish,
+            )
+        else:
+            finish()
+
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Report where the time of sampled requests went.
+
+    A share `SERVER_TIMING_SAMPLE_RATE` of requests is timed: database
+    time and query count, serializers, the rest of the view, rendering and
+    the total. They are sent as a `Server-Timing` header and logged as a
+    JSON line, and slow queries go to the slow query log of the endpoint.
+    Streaming responses are timed until their body is sent, after their
+    headers, so they are only logged.
+
+    Needs `RequestQueriesMiddleware` before it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+
+        timing = request.server_timing = RequestTiming(request.queries)
+        request.queries.on_finish(
+            lambda response: self.finish(request, response, timing),
+        )
+
+        return self.get_response(request)
+
+    def finish(self, request, response, timing):
+        """Report the timing of `request` once `response` is sent."""
+        timing.end = time.perf_counter()
+        if not response.streaming:
+            response['Server-Timing'] = timing.header()
+        timing.log(request, response)
+        if timing.queries.slow:
+            slow_query_log.record(timing.endpoint, timing.queries.slow)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.endpoint = request.resolver_match.view_name
+            timing.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.view_end = time.perf_counter()
+            response.add_post_render_callback(timing.rendered)
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record the latency and query count of every API request.
+
+    Requests are labelled with the view class and the action of the
+    viewset, or the method for other API views. Requests that do not reach
+    a REST framework view are not recorded. Streaming responses are
+    recorded once their body is sent.
+
+    Needs `RequestQueriesMiddleware` before it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        request.queries.on_finish(
+            lambda response: self.record(request, response, start),
+        )
+
+        return self.get_response(request)
+
+    def record(self, request, response, start):
+        """Record the request once `response` is sent."""
+        labels = getattr(request, 'metrics_labels', None)
+        if labels is None:
+            return
+        request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            status=response.status_code,
+            **labels,
+        )
+        db_queries.inc(request.queries.count, **labels)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        resolved = resolve_action(view_func, request)
+        if resolved is not None:
+            view_class, action = resolved
+            request.metrics_labels = {
+                'view': view_class.__name__,
+                'action': action,
+            }
+
+
+class QueryBudgetExceeded(Exception):
+    """A request made more queries than the budget of its action."""
+
+
+class QueryBudgetMiddleware:
+    """
+    Check requests against the query budget of their action.
+
+    Views declare the most queries each action may make, for example
+    `query_budgets = {'list': 3}`. With `QUERY_BUDGET_MODE` set to `log`
+    a request over budget is logged, with `raise` it raises so that tests
+    fail, with `off` budgets are not checked. Streaming responses are
+    checked once their body is sent, so they raise while it is read.
+
+    Needs `RequestQueriesMiddleware` before it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if mode != 'off':
+            request.queries.on_finish(
+                lambda response: self.check(request, mode),
+            )
+
+        return self.get_response(request)
+
+    def check(self, request, mode):
+        """Check the queries of `request` against its budget."""
+        budget = getattr(request, 'query_budget', None)
+        count = request.queries.count
+        if budget is None or count <= budget[2]:
+            return
+        view, action, limit = budget
+        message = (
+            f'{view}.{action} made {count} queries, its budget is {limit}.'
+        )
+        if mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        resolved = resolve_action(view_func, request)
+        if resolved is None:
+            return
+        view_class, action = resolved
+        limit = getattr(view_class, 'query_budgets', {}).get(action)
+        if limit is not None:
+            request.query_budget = (view_class.__name__, action, limit)
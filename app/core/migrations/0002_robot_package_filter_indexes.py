@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['user', 'weight'], name='package_user_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['user', 'name'], name='package_user_name_like_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['user', 'state'], name='robot_user_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['user', 'robot_model'], name='robot_user_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['user', 'battery'], name='robot_user_battery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['user', 'weight_limit'], name='robot_user_weight_limit_idx'),
+        ),
+    ]
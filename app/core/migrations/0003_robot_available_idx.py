@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_robot_package_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='robot',
+            name='robot_user_state_idx',
+        ),
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['user', 'state', 'weight_limit'], include=('battery',), name='robot_available_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+import django.db.models.deletion
+
+
+def keep_one_robot_per_package(apps, schema_editor):
+    """Unload packages from every robot but the first that loaded them."""
+    Robot = apps.get_model('core', 'Robot')
+    RobotPackage = apps.get_model('core', 'RobotPackage')
+
+    duplicates = RobotPackage.objects.values('package').annotate(
+        robots=Count('id'),
+        first=Min('id'),
+    ).filter(robots__gt=1)
+
+    for duplicate in duplicates.iterator():
+        extra = RobotPackage.objects.filter(
+            package_id=duplicate['package'],
+        ).exclude(id=duplicate['first']).select_related('package')
+        for robot_package in extra:
+            Robot.objects.filter(pk=robot_package.robot_id).update(
+                weight_limit=F('weight_limit') + robot_package.package.weight,
+            )
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        # The table of the implicit through model is kept as it is.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='RobotPackage',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('robot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.robot')),
+                        ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.package')),
+                    ],
+                    options={
+                        'db_table': 'core_robot_packages',
+                        'unique_together': {('robot', 'package')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='robot',
+                    name='packages',
+                    field=models.ManyToManyField(through='core.RobotPackage', to='core.Package'),
+                ),
+            ],
+        ),
+        migrations.RunPython(
+            keep_one_robot_per_package,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_robotpackage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='robotpackage',
+            name='package',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='core.package'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='robotpackage',
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,160 @@
+"""
+First step of moving Robot and Package to integer primary keys.
+
+Runs outside a transaction so it can be applied to a live database: the
+new key columns are added without a table rewrite, backfilled in batches
+that commit one by one, and indexed concurrently. A trigger keeps the new
+columns of the through table in step with rows inserted meanwhile. The
+keys are swapped by 0009.
+"""
+from django.db import migrations
+
+
+BATCH_SIZE = 10000
+
+TABLES = [('core_robot', 'serial_number'), ('core_package', 'code')]
+
+SYNC_THROUGH_FUNCTION = """
+CREATE OR REPLACE FUNCTION core_robot_packages_sync_new_ids()
+RETURNS trigger AS $$
+BEGIN
+    NEW.robot_new_id := (
+        SELECT id FROM core_robot WHERE serial_number = NEW.robot_id
+    );
+    NEW.package_new_id := (
+        SELECT id FROM core_package WHERE code = NEW.package_id
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+SYNC_THROUGH_TRIGGER = """
+CREATE TRIGGER core_robot_packages_sync_new_ids
+BEFORE INSERT OR UPDATE OF robot_id, package_id ON core_robot_packages
+FOR EACH ROW EXECUTE PROCEDURE core_robot_packages_sync_new_ids()
+"""
+
+
+def backfill(cursor, sql):
+    """Run the batched `sql` until it updates no more rows."""
+    while True:
+        cursor.execute(sql, [BATCH_SIZE])
+        if not cursor.rowcount:
+            break
+
+
+def add_surrogate_keys(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, key in TABLES:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {table}_id_seq')
+            cursor.execute(
+                f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS id bigint'
+            )
+            cursor.execute(
+                f'ALTER TABLE {table} ALTER COLUMN id '
+                f"SET DEFAULT nextval('{table}_id_seq')"
+            )
+            cursor.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'ADD COLUMN IF NOT EXISTS robot_new_id bigint, '
+            'ADD COLUMN IF NOT EXISTS package_new_id bigint'
+        )
+        cursor.execute(SYNC_THROUGH_FUNCTION)
+        cursor.execute(
+            'DROP TRIGGER IF EXISTS core_robot_packages_sync_new_ids '
+            'ON core_robot_packages'
+        )
+        cursor.execute(SYNC_THROUGH_TRIGGER)
+
+        for table, key in TABLES:
+            backfill(cursor, f"""
+                UPDATE {table} SET id = nextval('{table}_id_seq')
+                WHERE {key} IN (
+                    SELECT {key} FROM {table} WHERE id IS NULL LIMIT %s
+                )
+            """)
+        backfill(cursor, """
+            UPDATE core_robot_packages AS through
+            SET robot_new_id = robot.id, package_new_id = package.id
+            FROM core_robot AS robot, core_package AS package
+            WHERE robot.serial_number = through.robot_id
+                AND package.code = through.package_id
+                AND through.id IN (
+                    SELECT id FROM core_robot_packages
+                    WHERE robot_new_id IS NULL LIMIT %s
+                )
+        """)
+
+        # Validated checks let 0009 set NOT NULL without scanning the tables.
+        not_null_checks = [
+            (table, f'{table}_id_not_null', 'id IS NOT NULL')
+            for table, _ in TABLES
+        ] + [(
+            'core_robot_packages',
+            'core_robot_packages_new_ids_not_null',
+            'robot_new_id IS NOT NULL AND package_new_id IS NOT NULL',
+        )]
+        for table, name, check in not_null_checks:
+            cursor.execute(
+                f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}'
+            )
+            cursor.execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                f'CHECK ({check}) NOT VALID'
+            )
+            cursor.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+        for table, key in TABLES:
+            cursor.execute(
+                'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS '
+                f'{table}_id_uniq ON {table} (id)'
+            )
+            cursor.execute(
+                'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS '
+                f'{table}_{key}_uniq ON {table} ({key})'
+            )
+        cursor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            'core_robot_packages_robot_new_id '
+            'ON core_robot_packages (robot_new_id)'
+        )
+        cursor.execute(
+            'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS '
+            'core_robot_packages_package_new_id_uniq '
+            'ON core_robot_packages (package_new_id)'
+        )
+
+
+def remove_surrogate_keys(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'DROP TRIGGER IF EXISTS core_robot_packages_sync_new_ids '
+            'ON core_robot_packages'
+        )
+        cursor.execute(
+            'DROP FUNCTION IF EXISTS core_robot_packages_sync_new_ids()'
+        )
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'DROP COLUMN IF EXISTS robot_new_id, '
+            'DROP COLUMN IF EXISTS package_new_id'
+        )
+        for table, key in TABLES:
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_{key}_uniq')
+            cursor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS id')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_queuedfiledeletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_surrogate_keys, remove_surrogate_keys),
+    ]
@@ -0,0 +1,125 @@
+"""
+Swap Robot and Package to the integer keys backfilled by 0008.
+
+Every statement only changes the catalog, the indexes and NOT NULL checks
+were built beforehand, so the tables are locked for a moment. The foreign
+keys are added NOT VALID and validated by 0010.
+"""
+import django.core.validators
+from django.db import migrations, models
+
+
+TABLES = [('core_robot', 'serial_number'), ('core_package', 'code')]
+
+
+def swap_primary_keys(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'LOCK TABLE core_robot, core_package, core_robot_packages '
+            'IN ACCESS EXCLUSIVE MODE'
+        )
+        cursor.execute(
+            'DROP TRIGGER core_robot_packages_sync_new_ids '
+            'ON core_robot_packages'
+        )
+        cursor.execute('DROP FUNCTION core_robot_packages_sync_new_ids()')
+        # Takes the old foreign keys and unique constraint along.
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'DROP COLUMN robot_id, DROP COLUMN package_id'
+        )
+
+        for table, key in TABLES:
+            primary_key = next(
+                name
+                for name, constraint in connection.introspection.get_constraints(
+                    cursor,
+                    table,
+                ).items()
+                if constraint['primary_key']
+            )
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {primary_key}')
+            cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id SET NOT NULL')
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {table}_id_not_null')
+            cursor.execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+                f'PRIMARY KEY USING INDEX {table}_id_uniq'
+            )
+            cursor.execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT {table}_{key}_key '
+                f'UNIQUE USING INDEX {table}_{key}_uniq'
+            )
+
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'RENAME COLUMN robot_new_id TO robot_id'
+        )
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'RENAME COLUMN package_new_id TO package_id'
+        )
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'ALTER COLUMN robot_id SET NOT NULL, '
+            'ALTER COLUMN package_id SET NOT NULL, '
+            'DROP CONSTRAINT core_robot_packages_new_ids_not_null'
+        )
+        cursor.execute(
+            'ALTER INDEX core_robot_packages_robot_new_id '
+            'RENAME TO core_robot_packages_robot_id'
+        )
+        cursor.execute(
+            'ALTER TABLE core_robot_packages '
+            'ADD CONSTRAINT core_robot_packages_package_id_key '
+            'UNIQUE USING INDEX core_robot_packages_package_new_id_uniq'
+        )
+        for column, table in [
+            ('robot_id', 'core_robot'),
+            ('package_id', 'core_package'),
+        ]:
+            cursor.execute(
+                'ALTER TABLE core_robot_packages '
+                f'ADD CONSTRAINT core_robot_packages_{column}_fk '
+                f'FOREIGN KEY ({column}) REFERENCES {table} (id) '
+                'DEFERRABLE INITIALLY DEFERRED NOT VALID'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_surrogate_key_backfill'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(swap_primary_keys),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='package',
+                    name='id',
+                    field=models.BigAutoField(auto_created=True, default=None, primary_key=True, serialize=False, verbose_name='ID'),
+                    preserve_default=False,
+                ),
+                migrations.AddField(
+                    model_name='robot',
+                    name='id',
+                    field=models.BigAutoField(auto_created=True, default=None, primary_key=True, serialize=False, verbose_name='ID'),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name='package',
+                    name='code',
+                    field=models.CharField(max_length=50, unique=True, validators=[django.core.validators.MinLengthValidator(5), django.core.validators.RegexValidator(message='Only uppercase, numbers and underscore.', regex='\\b[A-Z0-9_]+\\b')]),
+                ),
+                migrations.AlterField(
+                    model_name='robot',
+                    name='serial_number',
+                    field=models.CharField(max_length=100, unique=True, validators=[django.core.validators.MinLengthValidator(5)]),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+"""
+Validate the foreign keys added by 0009 without blocking writes.
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_surrogate_key_swap'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'ALTER TABLE core_robot_packages '
+            'VALIDATE CONSTRAINT core_robot_packages_robot_id_fk',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'ALTER TABLE core_robot_packages '
+            'VALIDATE CONSTRAINT core_robot_packages_package_id_fk',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_user(apps, schema_editor):
+    """Copy the user of the robot to its loaded packages."""
+    Robot = apps.get_model('core', 'Robot')
+    RobotPackage = apps.get_model('core', 'RobotPackage')
+
+    RobotPackage.objects.update(user_id=Subquery(
+        Robot.objects.filter(pk=OuterRef('robot_id')).values('user_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0010_surrogate_key_validate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robotpackage',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_user, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='robotpackage',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+from core.partitioning import partition_by_user
+
+
+def partition_tenant_tables(apps, schema_editor):
+    """Partition the tenant tables if `DATABASE_TENANT_PARTITIONS` is set."""
+    if settings.DATABASE_TENANT_PARTITIONS:
+        partition_by_user(
+            schema_editor.connection,
+            settings.DATABASE_TENANT_PARTITIONS,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_robotpackage_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_tenant_tables,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -5,6 +5,7 @@ import uuid
 import os
 
 from model_utils import Choices
+from rest_framework.utils.encoders import JSONEncoder
 from django.conf import settings
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
@@ -98,7 +99,6 @@ class Robot(models.Model):
     )
 
     serial_number = models.CharField(
-        primary_key=True,
         max_length=100,
         unique=True,
         validators=[
@@ -131,7 +131,30 @@ class Robot(models.Model):
         choices=ROBOT_STATUS,
     )
 
-    packages = models.ManyToManyField('Package')
+    packages = models.ManyToManyField('Package', through='RobotPackage')
+
+    class Meta:
+        indexes = [
+            # Covers check_available, battery is only filtered on so it is
+            # carried in the leaf pages instead of the key.
+            models.Index(
+                fields=['user', 'state', 'weight_limit'],
+                name='robot_available_idx',
+                include=['battery'],
+            ),
+            models.Index(
+                fields=['user', 'robot_model'],
+                name='robot_user_model_idx',
+            ),
+            models.Index(
+                fields=['user', 'battery'],
+                name='robot_user_battery_idx',
+            ),
+            models.Index(
+                fields=['user', 'weight_limit'],
+                name='robot_user_weight_limit_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.serial_number
@@ -154,7 +177,6 @@ class Package(models.Model):
         on_delete=models.CASCADE,
     )
     code = models.CharField(
-        primary_key=True,
         max_length=50,
         unique=True,
         validators=[
@@ -185,13 +207,101 @@ class Package(models.Model):
     )
     image = models.ImageField(null=True, upload_to=package_image_file_path)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'weight'],
+                name='package_user_weight_idx',
+            ),
+            # LIKE 'prefix%' can only use a btree index in a non C collation
+            # with the pattern operator class, which also serves equality.
+            models.Index(
+                fields=['user', 'name'],
+                name='package_user_name_like_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class RobotPackageQuerySet(models.QuerySet):
+    """Queryset of loaded packages."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Fill the user of rows added with `robot.packages.add()`."""
+        objs = list(objs)
+        robot_ids = {obj.robot_id for obj in objs if obj.user_id is None}
+        if robot_ids:
+            users = dict(Robot.objects.using(self.db).filter(
+                pk__in=robot_ids,
+            ).values_list('pk', 'user_id'))
+            for obj in objs:
+                if obj.user_id is None:
+                    obj.user_id = users.get(obj.robot_id)
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class RobotPackage(models.Model):
+    """Package loaded on a Robot, a package is on at most one robot."""
+
+    # The user of the robot and the package, the key of the partitions.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    robot = models.ForeignKey(Robot, on_delete=models.CASCADE)
+    package = models.OneToOneField(Package, on_delete=models.CASCADE)
+
+    objects = RobotPackageQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'core_robot_packages'
+
+    def __str__(self):
+        return f'{self.package_id} on {self.robot_id}'
+
+
 @receiver(models.signals.post_delete, sender=Package)
 def post_delete_package(sender, instance, *args, **kwargs):
     """ Clean Old Image file """
     if instance.image:
         if os.path.isfile(instance.image.path):
             os.remove(instance.image.path)
+
+
+class IdempotencyKey(models.Model):
+    """Response stored for a request sent with an `Idempotency-Key`."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=JSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='idempotency_key_user_key_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class QueuedFileDeletion(models.Model):
+    """File left by a bulk delete, removed by `delete_queued_files`."""
+
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
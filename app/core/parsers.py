@@ -0,0 +1,40 @@
+"""
+Parsers for the API.
+"""
+import orjson
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core import renderers
+
+
+class ORJSONParser(parsers.JSONParser):
+    """Parses JSON-serialized data with orjson."""
+    renderer_class = renderers.ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON."""
+        try:
+            return orjson.loads(stream.read() if stream else b'')
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parses MessagePack-serialized data."""
+    media_type = 'application/msgpack'
+    renderer_class = renderers.MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as MessagePack."""
+        # Imported on first use, most clients never send MessagePack.
+        import msgpack
+
+        try:
+            return msgpack.unpackb(
+                stream.read() if stream else b'',
+                raw=False,
+                strict_map_key=False,
+            )
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
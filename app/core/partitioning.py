@@ -0,0 +1,198 @@
+"""
+Hash partitioning of the tenant tables by user.
+"""
+
+
+PARTITIONED_TABLES = ['core_robot', 'core_package', 'core_robot_packages']
+
+# Unique keys of each table once partitioned. A unique key of a partitioned
+# table must include user_id, the existing keys get it appended.
+UNIQUE_KEYS = {
+    'core_robot': [('serial_number', 'user_id')],
+    'core_package': [('code', 'user_id')],
+    'core_robot_packages': [('package_id', 'user_id')],
+}
+
+# Columns that stay unique across users, through an unpartitioned table of
+# their values kept up to date by a trigger.
+GLOBAL_UNIQUE_COLUMNS = {
+    'core_robot': 'serial_number',
+    'core_package': 'code',
+}
+
+# Foreign keys to the partitioned tables, rebuilt with user_id so that they
+# reference their (id, user_id) primary key.
+TENANT_FOREIGN_KEYS = {
+    'core_robot_packages': {
+        'robot_id': 'core_robot',
+        'package_id': 'core_package',
+    },
+}
+
+KEYS_TRIGGER = """
+CREATE FUNCTION {keys}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.{column} = OLD.{column} THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {keys} WHERE {column} = OLD.{column};
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {keys} ({column}) VALUES (NEW.{column});
+    END IF;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER {keys}
+AFTER INSERT OR UPDATE OF {column} OR DELETE ON {table}
+FOR EACH ROW EXECUTE FUNCTION {keys}();
+"""
+
+
+def is_partitioned(cursor, table):
+    """Return whether `table` is a partitioned table."""
+    cursor.execute(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass",
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def partition_by_user(connection, partitions):
+    """
+    Rebuild the tenant tables as `partitions` hash partitions of user_id.
+
+    Tables that are already partitioned are left alone. The rows are copied
+    under an exclusive lock, so this is meant for a maintenance window or
+    a database that is still small.
+    """
+    with connection.cursor() as cursor:
+        # Pending deferred foreign key checks would block the DDL below.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        tables = [
+            table for table in PARTITIONED_TABLES
+            if not is_partitioned(cursor, table)
+        ]
+        for table in tables:
+            cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+        drop_tenant_foreign_keys(cursor, tables)
+
+        for table in tables:
+            partition_table(cursor, table, partitions)
+            if table in GLOBAL_UNIQUE_COLUMNS:
+                create_keys_table(cursor, table, GLOBAL_UNIQUE_COLUMNS[table])
+        for table in tables:
+            foreign_keys = TENANT_FOREIGN_KEYS.get(table, {})
+            for column, referenced in foreign_keys.items():
+                cursor.execute(
+                    f'ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fk '
+                    f'FOREIGN KEY ({column}, user_id) '
+                    f'REFERENCES {referenced} (id, user_id) '
+                    'DEFERRABLE INITIALLY DEFERRED'
+                )
+
+
+def drop_tenant_foreign_keys(cursor, tables):
+    """
+    Drop the foreign keys referencing `tables`.
+
+    They only reference id, which stops being unique on its own, and are
+    rebuilt from `TENANT_FOREIGN_KEYS` once the tables are partitioned.
+    """
+    cursor.execute(
+        'SELECT conrelid::regclass::text, conname, a.attname::text '
+        'FROM pg_constraint '
+        'JOIN pg_attribute a '
+        'ON a.attrelid = conrelid AND a.attnum = conkey[1] '
+        "WHERE contype = 'f' AND confrelid = ANY(%s::regclass[])",
+        [tables],
+    )
+    for table, name, column in cursor.fetchall():
+        if column not in TENANT_FOREIGN_KEYS.get(table, {}):
+            raise ValueError(
+                f'{table}.{column} references a tenant table and cannot be '
+                'rebuilt once it is partitioned.'
+            )
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+
+
+def partition_table(cursor, table, partitions):
+    """Copy `table` into a new table partitioned by HASH (user_id)."""
+    unpartitioned = f'{table}_unpartitioned'
+
+    cursor.execute(
+        'SELECT pg_get_indexdef(indexrelid), indisunique, array('
+        '    SELECT attname::text FROM unnest(indkey) WITH ORDINALITY '
+        '    AS key(attnum, position) '
+        '    JOIN pg_attribute '
+        '    ON attrelid = indrelid AND pg_attribute.attnum = key.attnum '
+        '    ORDER BY position'
+        ') FROM pg_index '
+        'WHERE indrelid = %s::regclass AND NOT indisprimary',
+        [table],
+    )
+    indexes = cursor.fetchall()
+    for _, unique, columns in indexes:
+        key = tuple(columns) if 'user_id' in columns else (*columns, 'user_id')
+        if unique and key not in UNIQUE_KEYS[table]:
+            raise ValueError(
+                f'The unique key {columns} of {table} has no partitioned '
+                'equivalent in UNIQUE_KEYS.'
+            )
+
+    cursor.execute(
+        'SELECT pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = [definition for definition, in cursor.fetchall()]
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence, = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {unpartitioned}')
+    cursor.execute(
+        f'CREATE TABLE {table} '
+        f'(LIKE {unpartitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        'PARTITION BY HASH (user_id)'
+    )
+    for remainder in range(partitions):
+        cursor.execute(
+            f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+            f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        )
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {unpartitioned}')
+    cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute(f'DROP TABLE {unpartitioned}')
+
+    cursor.execute(
+        f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+        'PRIMARY KEY (id, user_id)'
+    )
+    for columns in UNIQUE_KEYS[table]:
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{columns[0]}_key "
+            f"UNIQUE ({', '.join(columns)})"
+        )
+    for definition, unique, _ in indexes:
+        if not unique:
+            cursor.execute(definition)
+    for definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD {definition}')
+
+
+def create_keys_table(cursor, table, column):
+    """Keep `column` of the partitioned `table` unique across users."""
+    keys = f'{table}_{column}_keys'
+    cursor.execute(
+        'SELECT format_type(atttypid, atttypmod) FROM pg_attribute '
+        'WHERE attrelid = %s::regclass AND attname = %s',
+        [table, column],
+    )
+    column_type, = cursor.fetchone()
+
+    cursor.execute(f'CREATE TABLE {keys} ({column} {column_type} PRIMARY KEY)')
+    cursor.execute(
+        f'INSERT INTO {keys} ({column}) SELECT {column} FROM {table}'
+    )
+    cursor.execute(KEYS_TRIGGER.format(keys=keys, table=table, column=column))
@@ -0,0 +1,122 @@
+"""
+Profiles of single API requests, and their collapsed stacks.
+"""
+import os
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+
+
+def wants_profile(request):
+    """Return whether a staff user asked to profile `request`."""
+    if not settings.PROFILING_ENABLED or not request.user.is_staff:
+        return False
+
+    return request.META.get(PROFILE_HEADER) == '1' or \
+        request.query_params.get(PROFILE_PARAM) == '1'
+
+
+def save_profile(profiler, endpoint):
+    """Store the stats of `profiler` and return the file name."""
+    os.makedirs(settings.PROFILING_ROOT, exist_ok=True)
+    name = f'{endpoint}.{time.time_ns()}-{os.getpid()}.prof'
+    profiler.dump_stats(os.path.join(settings.PROFILING_ROOT, name))
+    trim_profiles()
+
+    return name
+
+
+def trim_profiles():
+    """Remove the oldest profiles beyond the count and size limits."""
+    profiles = []
+    for name in os.listdir(settings.PROFILING_ROOT):
+        if not name.endswith('.prof'):
+            continue
+        path = os.path.join(settings.PROFILING_ROOT, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Trimmed by another worker meanwhile.
+            continue
+        profiles.append((stat.st_mtime, stat.st_size, path))
+
+    total = 0
+    profiles.sort(reverse=True)
+    for count, (_, size, path) in enumerate(profiles, start=1):
+        total += size
+        if count > settings.PROFILING_MAX_FILES or \
+                total > settings.PROFILING_MAX_BYTES:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def profile_endpoint(name):
+    """Return the endpoint a profile file name was saved for."""
+    return re.sub(r'\.\d+-\d+\.prof$', '', name)
+
+
+def format_frame(func):
+    """Return the frame name of a pstats function key."""
+    filename, line, name = func
+    if filename == '~':
+        return name
+
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def collapse_stats(stats):
+    """
+    Return the collapsed stacks of `stats` with their time in microseconds.
+
+    cProfile only keeps caller and callee pairs, so stacks are rebuilt from
+    the root functions down and the time of a function is shared among its
+    callers by the time spent in it from each of them.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    stacks = Counter()
+
+    def walk(func, path, share):
+        _, _, self_time, cumulative, _ = stats.stats[func]
+        path = (*path, func)
+        # Paths under a microsecond would be rounded away anyway.
+        if not cumulative or share < 1e-6:
+            return
+        ratio = share / cumulative
+        stacks[';'.join(map(format_frame, path))] += self_time * ratio
+        for callee, time_in_callee in callees.get(func, {}).items():
+            # Recursion is folded into the first call of the function.
+            if callee not in path:
+                walk(callee, path, time_in_callee * ratio)
+
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            walk(func, (), cumulative)
+
+    return Counter({
+        stack: round(seconds * 1_000_000)
+        for stack, seconds in stacks.items()
+        if round(seconds * 1_000_000)
+    })
+
+
+def collapse_profiles(paths):
+    """Return the summed collapsed stacks of the profiles in `paths`."""
+    import pstats
+
+    stacks = Counter()
+    for path in paths:
+        stacks.update(collapse_stats(pstats.Stats(path)))
+
+    return stacks
@@ -0,0 +1,86 @@
+"""
+Renderers for the API.
+"""
+import orjson
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """Encode the types that orjson and msgpack do not know about."""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Renderer which serializes to JSON with orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=encode_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+        # Escape U+2028 and U+2029 like the JSONRenderer does.
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renderer which serializes to MessagePack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into MessagePack, returning a bytestring."""
+        if data is None:
+            return b''
+        # Imported on first use, most clients never ask for MessagePack.
+        import msgpack
+
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Renderer which serializes to newline delimited JSON."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render a list as one line per item and anything else as a line."""
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+
+        return b''.join(iter_ndjson(data))
+
+
+def iter_ndjson(rows, buffer_size=65536):
+    """Encode `rows` as NDJSON, yielding buffers of about `buffer_size`."""
+    buffer = bytearray()
+    for row in rows:
+        buffer += orjson.dumps(row, default=encode_default)
+        buffer += b'\n'
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
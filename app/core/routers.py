@@ -0,0 +1,70 @@
+"""
+Database routers.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_primary_pinned = ContextVar('primary_pinned', default=False)
+_written = ContextVar('written', default=False)
+
+
+def pin_primary():
+    """Send the remaining reads of the current request to the primary."""
+    _primary_pinned.set(True)
+
+
+def record_write():
+    """Note that the current request writes, and pin it to the primary."""
+    _written.set(True)
+    pin_primary()
+
+
+def unpin_primary():
+    """Allow reads of the current request to go to the replicas."""
+    _primary_pinned.set(False)
+    _written.set(False)
+
+
+def is_primary_pinned():
+    """Return whether reads must go to the primary."""
+    return _primary_pinned.get()
+
+
+def has_written():
+    """Return whether the current request writes."""
+    return _written.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to a random replica and writes to the primary.
+
+    Once something is written, reads stick to the primary for the rest of
+    the request so they see their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Return the database alias to read `model` from."""
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_primary_pinned() or \
+                connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        """Return the database alias to write `model` to."""
+        record_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same data as the primary."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only migrate the primary, replicas follow it."""
+        return db == DEFAULT_DB_ALIAS
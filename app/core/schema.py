@@ -0,0 +1,133 @@
+"""
+Precomputed OpenAPI schema.
+"""
+import gzip
+import hashlib
+import inspect
+import json
+import os
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+
+
+SCHEMA_FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+SCHEMA_SOURCE_MODULES = ['urls', 'views', 'serializers', 'models']
+
+META_FILE = 'schema.meta.json'
+
+
+def schema_fingerprint():
+    """Return a hash of everything the generated schema depends on."""
+    import drf_spectacular
+
+    modules = [import_module(settings.ROOT_URLCONF)]
+    for app_config in apps.get_app_configs():
+        if not app_config.path.startswith(str(settings.BASE_DIR)):
+            continue
+        for name in SCHEMA_SOURCE_MODULES:
+            try:
+                modules.append(import_module(f'{app_config.name}.{name}'))
+            except ModuleNotFoundError:
+                pass
+
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items())).encode())
+    for module in sorted(modules, key=lambda m: m.__name__):
+        with open(inspect.getsourcefile(module), 'rb') as source:
+            digest.update(module.__name__.encode())
+            digest.update(source.read())
+
+    return digest.hexdigest()
+
+
+def _write_file(path, content):
+    """Write `content` to `path` without exposing a partial file."""
+    with open(f'{path}.tmp', 'wb') as tmp_file:
+        tmp_file.write(content)
+    os.replace(f'{path}.tmp', path)
+
+
+def read_schema_meta(root):
+    """Return the metadata of the schema stored in `root`, if any."""
+    try:
+        with open(os.path.join(root, META_FILE)) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_schema(root, fingerprint):
+    """Generate the schema and store every format in `root`."""
+    from drf_spectacular.renderers import (
+        OpenApiJsonRenderer,
+        OpenApiYamlRenderer,
+    )
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    renderers = {
+        'yaml': OpenApiYamlRenderer(),
+        'json': OpenApiJsonRenderer(),
+    }
+
+    os.makedirs(root, exist_ok=True)
+    meta = {'fingerprint': fingerprint, 'formats': {}}
+    for schema_format, renderer in renderers.items():
+        content = renderer.render(schema, renderer_context={})
+        file_name = f'schema.{schema_format}'
+        _write_file(os.path.join(root, file_name), content)
+        _write_file(
+            os.path.join(root, f'{file_name}.gz'),
+            gzip.compress(content, compresslevel=9, mtime=0),
+        )
+
+        meta['formats'][schema_format] = {
+            'file': file_name,
+            'etag': hashlib.sha256(content).hexdigest()[:32],
+        }
+
+    _write_file(os.path.join(root, META_FILE), json.dumps(meta).encode())
+
+    return meta
+
+
+_loaded_schemas = {}
+
+
+def load_schema(root):
+    """
+    Return the metadata and content of the schema stored in `root`.
+
+    Files are read once per process and again only when the schema is
+    regenerated.
+    """
+    try:
+        mtime = os.stat(os.path.join(root, META_FILE)).st_mtime_ns
+    except OSError:
+        return None
+
+    loaded = _loaded_schemas.get(root)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+
+    meta = read_schema_meta(root)
+    if meta is None:
+        return None
+
+    contents = {}
+    for schema_format, info in meta['formats'].items():
+        path = os.path.join(root, info['file'])
+        with open(path, 'rb') as schema_file, \
+                open(f'{path}.gz', 'rb') as gzip_file:
+            contents[schema_format] = (schema_file.read(), gzip_file.read())
+
+    _loaded_schemas[root] = (mtime, (meta, contents))
+    return meta, contents
@@ -0,0 +1,211 @@
+"""
+Synthetic fleet data for load testing.
+"""
+import io
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from core.models import Package, Robot, RobotPackage
+
+
+# Share of robots per model, most fleets are light robots.
+MODEL_WEIGHTS = {
+    Robot.ROBOT_MODEL.lw: 40,
+    Robot.ROBOT_MODEL.mw: 30,
+    Robot.ROBOT_MODEL.cw: 20,
+    Robot.ROBOT_MODEL.hw: 10,
+}
+
+# Share of robots per state, with the (alpha, beta) of the battery level.
+STATE_WEIGHTS = {
+    Robot.ROBOT_STATUS.idl: (35, (5, 1.5)),
+    Robot.ROBOT_STATUS.ldg: (10, (4, 1.5)),
+    Robot.ROBOT_STATUS.ldd: (10, (4, 2)),
+    Robot.ROBOT_STATUS.dlg: (25, (3, 2)),
+    Robot.ROBOT_STATUS.dld: (10, (2, 2)),
+    Robot.ROBOT_STATUS.ret: (10, (1.5, 3)),
+}
+
+# Packages are only on robots in these states.
+CARRYING_STATES = {
+    Robot.ROBOT_STATUS.ldg,
+    Robot.ROBOT_STATUS.ldd,
+    Robot.ROBOT_STATUS.dlg,
+}
+
+
+def reserve_ids(cursor, model, count):
+    """
+    Draw `count` ids from the sequence of `model` and return them.
+
+    Each id comes from its own `nextval`, so ids drawn at the same time by
+    other sessions are never handed out twice, at the cost of the ids not
+    being contiguous.
+    """
+    if not count:
+        return []
+    cursor.execute(
+        "SELECT pg_get_serial_sequence(%s, 'id')",
+        [model._meta.db_table],
+    )
+    sequence, = cursor.fetchone()
+    cursor.execute(
+        'SELECT nextval(%s) FROM generate_series(1, %s)',
+        [sequence, count],
+    )
+
+    return [pk for pk, in cursor.fetchall()]
+
+
+def copy_rows(cursor, model, columns, rows):
+    """Load `rows` into the table of `model` with COPY."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(map(str, row)))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY {model._meta.db_table} ({', '.join(columns)}) FROM STDIN",
+        buffer,
+    )
+
+
+def tenant_rows(rng, prefix, user_id, robots, packages, loaded_ratio):
+    """
+    Return the robot, package and loaded rows of a user named `prefix`.
+
+    Ids are left as indexes into the returned lists, loaded packages are
+    spread over robots in a carrying state that still have capacity.
+    """
+    models = list(MODEL_WEIGHTS)
+    states = list(STATE_WEIGHTS)
+    robot_rows = []
+    for i in range(robots):
+        robot_model, = rng.choices(models, list(MODEL_WEIGHTS.values()))
+        state, = rng.choices(
+            states,
+            [weight for weight, _ in STATE_WEIGHTS.values()],
+        )
+        battery = round(100 * rng.betavariate(*STATE_WEIGHTS[state][1]))
+        robot_rows.append([
+            f'{prefix}-{i}',
+            user_id,
+            robot_model,
+            Robot.ROBOT_WEIGHTS[robot_model],
+            battery,
+            state,
+        ])
+
+    package_rows = [
+        [
+            f"{prefix.replace('-', '_')}_{i}",
+            user_id,
+            f'Package-{i}',
+            rng.randint(1, 50),
+        ]
+        for i in range(packages)
+    ]
+
+    carriers = [
+        i for i, row in enumerate(robot_rows) if row[5] in CARRYING_STATES
+    ]
+    loaded_rows = []
+    if carriers:
+        for i, package in enumerate(package_rows):
+            if rng.random() >= loaded_ratio:
+                continue
+            robot = rng.choice(carriers)
+            if robot_rows[robot][3] >= package[3]:
+                robot_rows[robot][3] -= package[3]
+                loaded_rows.append((robot, i))
+
+    return robot_rows, package_rows, loaded_rows
+
+
+def seed_fleet(
+    users,
+    robots_per_user,
+    packages_per_user,
+    loaded_ratio=0.3,
+    seed=0,
+    chunk_size=100_000,
+):
+    """
+    Create `users` users with their robots and packages, return the users.
+
+    Rows are generated from `seed`, so the same arguments always give the
+    same fleet, and loaded with COPY about `chunk_size` rows at a time.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    users_per_chunk = max(
+        chunk_size // max(robots_per_user + packages_per_user, 1),
+        1,
+    )
+
+    created = []
+    for start in range(0, users, users_per_chunk):
+        with transaction.atomic(), connection.cursor() as cursor:
+            chunk = get_user_model().objects.bulk_create(
+                get_user_model()(
+                    email=f'fleet-{seed}-{i}@example.com',
+                    password=password,
+                )
+                for i in range(start, min(start + users_per_chunk, users))
+            )
+            robot_rows, package_rows, loaded_rows = [], [], []
+            for tenant, user in enumerate(chunk, start=start):
+                robots, packages, loaded = tenant_rows(
+                    rng,
+                    f'FLEET{seed}-{tenant}',
+                    user.id,
+                    robots_per_user,
+                    packages_per_user,
+                    loaded_ratio,
+                )
+                loaded_rows.extend(
+                    (len(robot_rows) + robot, len(package_rows) + package)
+                    for robot, package in loaded
+                )
+                robot_rows.extend(robots)
+                package_rows.extend(packages)
+
+            robot_ids = reserve_ids(cursor, Robot, len(robot_rows))
+            package_ids = reserve_ids(cursor, Package, len(package_rows))
+            copy_rows(
+                cursor,
+                Robot,
+                ['id', 'serial_number', 'user_id', 'robot_model',
+                 'weight_limit', 'battery', 'state'],
+                ([pk, *row] for pk, row in zip(robot_ids, robot_rows)),
+            )
+            copy_rows(
+                cursor,
+                Package,
+                ['id', 'code', 'user_id', 'name', 'weight'],
+                ([pk, *row] for pk, row in zip(package_ids, package_rows)),
+            )
+            copy_rows(
+                cursor,
+                RobotPackage,
+                ['user_id', 'robot_id', 'package_id'],
+                (
+                    (
+                        robot_rows[robot][1],
+                        robot_ids[robot],
+                        package_ids[package],
+                    )
+                    for robot, package in loaded_rows
+                ),
+            )
+        created.extend(chunk)
+
+    with connection.cursor() as cursor:
+        for model in (Robot, Package, RobotPackage):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    return created
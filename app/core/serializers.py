@@ -0,0 +1,14 @@
+"""
+Serializers shared by the API apps.
+"""
+
+
+class DynamicFieldsMixin:
+    """Serializer that only renders the field names passed as `fields`."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,38 @@
+"""
+Helpers for the tests of the API.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class QueryBudgetTestMixin:
+    """Check the query budgets of views against two sizes of data."""
+
+    def assertQueryBudget(self, view_class, action, request, grow):
+        """
+        Assert `request` stays in the budget of `action` as data grows.
+
+        `request(i)` makes the i-th request and returns the response, it is
+        made once, then again after `grow()` added more data. Both must
+        make the same number of queries, within the budget.
+        """
+        counts = []
+        for i in range(2):
+            if i:
+                grow()
+            with CaptureQueriesContext(connection) as queries, \
+                    override_settings(QUERY_BUDGET_MODE='raise'):
+                res = request(i)
+                if res.streaming:
+                    b''.join(res.streaming_content)
+            self.assertLess(
+                res.status_code,
+                400,
+                getattr(res, 'data', None),
+            )
+            counts.append(len(queries))
+
+        self.assertLessEqual(counts[0], view_class.query_budgets[action])
+        self.assertEqual(counts[0], counts[1], f'{action} grows with data.')
+
+        return counts[0]
@@ -0,0 +1,101 @@
+"""
+Tests for the robot capacity index.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.capacity import AVAILABLE_STATES, CapacityIndex
+from core.models import Package, Robot
+
+
+class CapacityIndexTests(TestCase):
+    """Test looking up robots by remaining capacity."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        cache.clear()
+        self.index = CapacityIndex()
+        for serial_number, weight_limit in [
+            ('Test1', 100),
+            ('Test2', 250),
+            ('Test3', 250),
+            ('Test4', 500),
+        ]:
+            Robot.objects.create(
+                user=self.user,
+                serial_number=serial_number,
+                weight_limit=weight_limit,
+            )
+
+    def load(self, user_id):
+        """Return the capacity and serial number of available robots."""
+        return list(Robot.objects.filter(
+            user_id=user_id,
+            state__in=AVAILABLE_STATES,
+        ).order_by('weight_limit', 'serial_number').values_list(
+            'weight_limit',
+            'serial_number',
+        ))
+
+    def fits(self, index, weight, limit=10):
+        """Return the serial numbers `index` fits for `weight`."""
+        return index.fits(self.user.id, weight, limit, self.load)
+
+    def test_fits(self):
+        """Test robots with enough capacity are returned smallest first."""
+        self.assertEqual(
+            self.fits(self.index, 200),
+            ['Test2', 'Test3', 'Test4'],
+        )
+        self.assertEqual(self.fits(self.index, 250, 1), ['Test2'])
+        self.assertEqual(self.fits(self.index, 501), [])
+
+    def test_fits_cached(self):
+        """Test a loaded entry answers without querying."""
+        self.fits(self.index, 200)
+
+        with self.assertNumQueries(0):
+            self.fits(self.index, 300)
+
+    def test_invalidate(self):
+        """Test invalidating reloads the entry."""
+        self.fits(self.index, 200)
+        Robot.objects.filter(serial_number='Test4').update(weight_limit=50)
+
+        self.index.invalidate(self.user.id)
+
+        self.assertEqual(self.fits(self.index, 200), ['Test2', 'Test3'])
+
+    def test_write_outdates_other_processes(self):
+        """Test a robot saved in one process outdates the others."""
+        other_index = CapacityIndex()
+        self.fits(other_index, 200)
+
+        robot = Robot.objects.get(serial_number='Test4')
+        robot.state = Robot.ROBOT_STATUS.dlg
+        robot.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.fits(other_index, 200), ['Test2', 'Test3'])
+
+    def test_package_write_outdates_entry(self):
+        """Test a package saved by the user outdates their entry."""
+        self.fits(self.index, 200)
+
+        Package.objects.create(user=self.user, code='TEST1', weight=10)
+
+        with self.assertNumQueries(1):
+            self.fits(self.index, 200)
+
+    def test_evicted_generation_reloads(self):
+        """Test entries are reloaded when the generation was evicted."""
+        self.fits(self.index, 200)
+
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            self.fits(self.index, 200)
@@ -1,13 +1,25 @@
 """
 Test custom Django management commands.
 """
+import io
+import json
+import os
+import tempfile
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.management.commands.benchmark_api import find_regressions, \
+    percentile
+from core.management.commands.import_times import parse_import_times
+from core.models import Package, QueuedFileDeletion, Robot, RobotPackage
+from core.seeding import CARRYING_STATES, reserve_ids
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +44,185 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportTimesTests(SimpleTestCase):
+    """Test the import time report."""
+
+    def test_parse_import_times(self):
+        """Test parsing the output of `python -X importtime`."""
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     rest_framework.compat',
+            'import time:      2360 |       2480 |   rest_framework.renderers',
+            'boot=1.0',
+        ]
+
+        imports = parse_import_times(lines)
+
+        self.assertEqual(imports, [
+            ('rest_framework.compat', 120, 120),
+            ('rest_framework.renderers', 2360, 2480),
+        ])
+
+
+class BenchmarkAPITests(TestCase):
+    """Test the endpoint benchmark."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_find_regressions(self):
+        """Test metrics beyond the threshold are reported."""
+        baseline = {'robot-list@10': {
+            'p50_ms': 10.0,
+            'p95_ms': 10.0,
+            'p99_ms': 1.0,
+            'queries': 3,
+            'alloc_kib': 100.0,
+        }}
+        results = {'robot-list@10': {
+            'p50_ms': 11.0,
+            'p95_ms': 13.0,
+            'p99_ms': 1.3,
+            'queries': 4,
+            'alloc_kib': 130.0,
+        }, 'robot-list@1000': baseline['robot-list@10']}
+
+        regressions = find_regressions(baseline, results, 0.2)
+
+        self.assertEqual(regressions, [
+            ('robot-list@10', 'p95_ms', 10.0, 13.0),
+            ('robot-list@10', 'queries', 3, 4),
+            ('robot-list@10', 'alloc_kib', 100.0, 130.0),
+        ])
+
+    def test_benchmark_api(self):
+        """Test results are written as JSON and leave no data behind."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+
+            call_command(
+                'benchmark_api',
+                scales=[3],
+                requests=2,
+                endpoints=['robot-list', 'robot-load-package'],
+                output=output,
+                stdout=io.StringIO(),
+            )
+
+            with open(output) as f:
+                results = json.load(f)['results']
+
+        self.assertEqual(
+            sorted(results),
+            ['robot-list@3', 'robot-load-package@3'],
+        )
+        self.assertEqual(results['robot-list@3']['queries'], 3)
+        self.assertFalse(Robot.objects.exists())
+
+
+class DeleteQueuedFilesTests(TestCase):
+    """Test removing files queued by bulk deletes."""
+
+    def test_delete_queued_files(self):
+        """Test queued files are removed and dequeued in batches."""
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            for i in range(3):
+                with open(os.path.join(media_root, f'{i}.jpg'), 'wb'):
+                    pass
+                QueuedFileDeletion.objects.create(name=f'{i}.jpg')
+            QueuedFileDeletion.objects.create(name='missing.jpg')
+
+            call_command(
+                'delete_queued_files',
+                batch_size=2,
+                stdout=io.StringIO(),
+            )
+
+            self.assertEqual(os.listdir(media_root), [])
+        self.assertFalse(QueuedFileDeletion.objects.exists())
+
+
+class SeedFleetTests(TestCase):
+    """Test generating a synthetic fleet."""
+
+    def seed(self):
+        """Seed a small fleet and return its robots and loaded packages."""
+        call_command(
+            'seed_fleet',
+            users=3,
+            robots_per_user=20,
+            packages_per_user=30,
+            loaded_ratio=0.5,
+            seed=7,
+            chunk_size=60,
+            stdout=io.StringIO(),
+        )
+
+        robots = list(Robot.objects.order_by('serial_number').values_list(
+            'serial_number',
+            'robot_model',
+            'weight_limit',
+            'battery',
+            'state',
+        ))
+        loaded = list(RobotPackage.objects.order_by(
+            'package__code',
+        ).values_list('robot__serial_number', 'package__code'))
+
+        return robots, loaded
+
+    def test_seed_fleet(self):
+        """Test the fleet is created with consistent loaded robots."""
+        robots, loaded = self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(len(robots), 60)
+        self.assertEqual(Package.objects.count(), 90)
+        self.assertTrue(loaded)
+        for robot in RobotPackage.objects.select_related('robot', 'package'):
+            self.assertEqual(robot.robot.user_id, robot.package.user_id)
+            self.assertIn(robot.robot.state, CARRYING_STATES)
+        for robot in Robot.objects.prefetch_related('packages'):
+            self.assertEqual(
+                robot.weight_limit + sum(
+                    package.weight for package in robot.packages.all()
+                ),
+                Robot.ROBOT_WEIGHTS[robot.robot_model],
+            )
+
+    def test_seed_fleet_deterministic(self):
+        """Test the same seed generates the same fleet."""
+        first = self.seed()
+        get_user_model().objects.all().delete()
+
+        self.assertEqual(self.seed(), first)
+
+    def test_reserved_ids_not_reused(self):
+        """Test ids drawn after a reservation are outside of it."""
+        with connection.cursor() as cursor:
+            ids = reserve_ids(cursor, Robot, 5)
+        robot = Robot.objects.create(
+            user=get_user_model().objects.create_user(
+                email='test@example.com',
+                password='12345678',
+            ),
+            serial_number='Test1',
+        )
+
+        self.assertEqual(len(set(ids)), 5)
+        self.assertNotIn(robot.pk, ids)
+
+    def test_seed_fleet_exists(self):
+        """Test seeding twice with the same seed is refused."""
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
@@ -0,0 +1,136 @@
+"""
+Tests for response compression.
+"""
+import gzip
+from unittest import skipUnless
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import CompressionMiddleware, parse_accept_encoding
+
+
+CONTENT = b'{"serial_number":"Test1","state":"Idle"}' * 50
+
+
+def compress_response(response, accept_encoding):
+    """Run `response` through the middleware and return it."""
+    request = RequestFactory().get(
+        '/api/robot/',
+        HTTP_ACCEPT_ENCODING=accept_encoding,
+    )
+    middleware = CompressionMiddleware(lambda request: response)
+    return middleware(request)
+
+
+def json_response(content=CONTENT):
+    """Create and return a JSON response."""
+    return HttpResponse(content, content_type='application/json')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test negotiating and compressing responses."""
+
+    def test_parse_accept_encoding(self):
+        """Test parsing quality values."""
+        codings = parse_accept_encoding('gzip;q=0.5, br, zstd;q=0')
+
+        self.assertEqual(codings, {'gzip': 0.5, 'br': 1.0, 'zstd': 0.0})
+
+    def test_gzip(self):
+        """Test a gzip client gets a gzip body."""
+        res = compress_response(json_response(), 'gzip, deflate')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(gzip.decompress(res.content), CONTENT)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli(self):
+        """Test a brotli client gets a brotli body."""
+        res = compress_response(json_response(), 'gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), CONTENT)
+
+    @skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd_preferred(self):
+        """Test zstd is preferred on equal quality."""
+        res = compress_response(json_response(), 'gzip, br, zstd')
+
+        self.assertEqual(res['Content-Encoding'], 'zstd')
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompressobj().decompress(
+                res.content
+            ),
+            CONTENT,
+        )
+
+    def test_quality_respected(self):
+        """Test a coding refused with q=0 is not used."""
+        res = compress_response(json_response(), 'gzip;q=0, identity')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, CONTENT)
+
+    def test_small_response_not_compressed(self):
+        """Test responses under the minimum size are sent as they are."""
+        res = compress_response(json_response(b'{}'), 'gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, b'{}')
+
+    def test_binary_content_type_not_compressed(self):
+        """Test images are not compressed."""
+        response = HttpResponse(CONTENT, content_type='image/png')
+
+        res = compress_response(response, 'gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_encoded_response_not_compressed(self):
+        """Test a response that is already encoded is left alone."""
+        response = json_response()
+        response['Content-Encoding'] = 'gzip'
+
+        res = compress_response(response, 'gzip')
+
+        self.assertEqual(res.content, CONTENT)
+
+    def test_streaming_response(self):
+        """Test streaming responses are compressed chunk by chunk."""
+        chunks = [b'{"serial_number":"Test%d"}\n' % i for i in range(100)]
+        response = StreamingHttpResponse(
+            iter(chunks),
+            content_type='application/x-ndjson',
+        )
+
+        res = compress_response(response, 'gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)),
+            b''.join(chunks),
+        )
+
+    def test_strong_etag_weakened(self):
+        """Test a strong ETag becomes weak once the body is compressed."""
+        response = json_response()
+        response['ETag'] = '"abc"'
+
+        res = compress_response(response, 'gzip')
+
+        self.assertEqual(res['ETag'], 'W/"abc"')
@@ -0,0 +1,109 @@
+"""
+Tests for the database backend.
+"""
+import copy
+from unittest.mock import patch
+
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase
+
+from core.db.backends.postgresql.base import DatabaseWrapper, PoolTimeout, \
+    close_pools
+from core.exceptions import exception_handler
+
+
+def create_wrapper(**params):
+    """Create and return a database wrapper for the test database."""
+    settings_dict = copy.deepcopy(connections['default'].settings_dict)
+    settings_dict.update(params)
+    return DatabaseWrapper(settings_dict, alias='backend_test')
+
+
+class DatabaseBackendTests(SimpleTestCase):
+    """Test persistent and pooled connections."""
+    databases = {'default'}
+
+    def tearDown(self):
+        close_pools()
+
+    def test_pooled_connection_reused(self):
+        """Test closing a pooled connection returns it to the pool."""
+        wrapper = create_wrapper(POOL={'MIN_SIZE': 1, 'MAX_SIZE': 2})
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+        wrapper.close()
+
+        self.assertFalse(raw_connection.closed)
+
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw_connection)
+        wrapper.close()
+
+    def test_pool_waits_for_connection(self):
+        """Test an empty pool times out, then serves a returned one."""
+        pool = {'MIN_SIZE': 1, 'MAX_SIZE': 1, 'TIMEOUT': 0.01}
+        wrapper = create_wrapper(POOL=pool)
+        other = create_wrapper(POOL=pool)
+        wrapper.ensure_connection()
+
+        with self.assertRaises(OperationalError) as raised:
+            other.ensure_connection()
+
+        self.assertIsInstance(raised.exception.__cause__, PoolTimeout)
+        wrapper.close()
+        other.ensure_connection()
+        other.close()
+
+    def test_pool_timeout_unavailable(self):
+        """Test an API request that found the pool empty answers 503."""
+        try:
+            try:
+                raise PoolTimeout('No database connection was free.')
+            except PoolTimeout as exc:
+                raise OperationalError(*exc.args) from exc
+        except OperationalError as exc:
+            response = exception_handler(exc, {})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_connection_without_pool_closed(self):
+        """Test closing a connection without pool closes it."""
+        wrapper = create_wrapper(POOL=None)
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+        wrapper.close()
+
+        self.assertTrue(raw_connection.closed)
+
+    def test_health_check_replaces_unusable_connection(self):
+        """Test a failed health check opens a new connection."""
+        wrapper = create_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(DatabaseWrapper, 'is_usable', return_value=False):
+            wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, raw_connection)
+        self.assertTrue(raw_connection.closed)
+        wrapper.close()
+
+    def test_health_check_once_per_request(self):
+        """Test the health check runs only once after a request ends."""
+        wrapper = create_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(
+            DatabaseWrapper,
+            'is_usable',
+            return_value=True,
+        ) as patched_usable:
+            wrapper.ensure_connection()
+            wrapper.ensure_connection()
+
+        patched_usable.assert_called_once()
+        wrapper.close()
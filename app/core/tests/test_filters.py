@@ -0,0 +1,207 @@
+"""
+Tests for the lookup filter backend.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.filters import LookupFilterBackend
+from core.models import Package, Robot
+from package.views import PackageViewSet
+from robot.views import RobotViewSet
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+PACKAGES_URL = reverse('package:package-list')
+
+
+def filter_queryset(viewset, queryset, params):
+    """Filter `queryset` the way `viewset` does for `params`."""
+    request = Request(APIRequestFactory().get('/', params))
+    return LookupFilterBackend().filter_queryset(request, queryset, viewset())
+
+
+class LookupFilterAPITests(TestCase):
+    """Test filtering robots and packages through the API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(self.user)
+        Robot.objects.create(
+            user=self.user, serial_number='Test1', state=0, battery=90,
+        )
+        Robot.objects.create(
+            user=self.user, serial_number='Test2', state=1, battery=40,
+            robot_model=3,
+        )
+        Robot.objects.create(
+            user=self.user, serial_number='Test3', state=3, battery=20,
+        )
+        Package.objects.create(
+            user=self.user, code='PKG_1', name='Books', weight=50,
+        )
+        Package.objects.create(
+            user=self.user, code='PKG_2', name='Bottles', weight=150,
+        )
+        Package.objects.create(
+            user=self.user, code='PKG_3', name='Chairs', weight=300,
+        )
+
+    def serial_numbers(self, params):
+        res = self.client.get(ROBOTS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [robot['serial_number'] for robot in res.data]
+
+    def codes(self, params):
+        res = self.client.get(PACKAGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(package['code'] for package in res.data)
+
+    def test_filter_state_in(self):
+        """Test filtering robots on a list of states."""
+        self.assertEqual(
+            self.serial_numbers({'state__in': '0,1'}),
+            ['Test1', 'Test2'],
+        )
+
+    def test_filter_state_label(self):
+        """Test choice filters accept their labels."""
+        self.assertEqual(
+            self.serial_numbers({'state': 'delivering'}),
+            ['Test3'],
+        )
+
+    def test_filter_battery_and_model(self):
+        """Test combining robot filters."""
+        self.assertEqual(
+            self.serial_numbers({'battery__gte': 30, 'robot_model': 3}),
+            ['Test2'],
+        )
+
+    def test_filter_weight_limit(self):
+        """Test filtering robots on their capacity."""
+        self.assertEqual(
+            self.serial_numbers({'weight_limit__gte': 500}),
+            ['Test2'],
+        )
+
+    def test_filter_weight_range(self):
+        """Test filtering packages on a weight range."""
+        self.assertEqual(
+            self.codes({'weight__range': '100,300'}),
+            ['PKG_2', 'PKG_3'],
+        )
+
+    def test_filter_name_startswith(self):
+        """Test filtering packages on a name prefix."""
+        self.assertEqual(
+            self.codes({'name__startswith': 'Bo'}),
+            ['PKG_1', 'PKG_2'],
+        )
+
+    def test_check_available_filtered(self):
+        """Test check_available applies the filters."""
+        res = self.client.get(
+            reverse('robot:robot-check-available'),
+            {'battery__gte': 50},
+        )
+
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test1'],
+        )
+
+    def test_invalid_value(self):
+        """Test an invalid filter value returns a 400."""
+        res = self.client.get(ROBOTS_URL, {'battery__gte': 'full'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('battery__gte', res.data)
+
+    def test_invalid_range(self):
+        """Test a range needs two values."""
+        res = self.client.get(PACKAGES_URL, {'weight__range': '100'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_undeclared_lookup_ignored(self):
+        """Test lookups a view does not declare are ignored."""
+        self.assertEqual(len(self.serial_numbers({'serial_number': 'x'})), 3)
+
+
+class LookupFilterIndexTests(TestCase):
+    """Test every filter can be answered from an index."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        Robot.objects.bulk_create(
+            Robot(
+                user=self.user,
+                serial_number=f'Test{i}',
+                robot_model=i % 4,
+                weight_limit=Robot.ROBOT_WEIGHTS[i % 4],
+                battery=i % 101,
+                state=i % 6,
+            )
+            for i in range(5000)
+        )
+        Package.objects.bulk_create(
+            Package(
+                user=self.user,
+                code=f'PKG_{i}',
+                name=f'Package{i}',
+                weight=i % 500 + 1,
+            )
+            for i in range(5000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_robot, core_package')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf'(using|on) {index_name}\b')
+
+    def test_robot_filters_use_indexes(self):
+        """Test robot filters use the composite user indexes."""
+        robots = Robot.objects.filter(user=self.user)
+        cases = [
+            ({'state__in': '0,1'}, 'robot_available_idx'),
+            ({'robot_model': '2'}, 'robot_user_model_idx'),
+            ({'battery__gte': '98'}, 'robot_user_battery_idx'),
+            ({'weight_limit__gte': '500'}, 'robot_user_weight_limit_idx'),
+        ]
+
+        for params, index_name in cases:
+            with self.subTest(params=params):
+                self.assertUsesIndex(
+                    filter_queryset(RobotViewSet, robots, params),
+                    index_name,
+                )
+
+    def test_package_filters_use_indexes(self):
+        """Test package filters use the composite user indexes."""
+        packages = Package.objects.filter(user=self.user)
+        cases = [
+            ({'weight__range': '10,12'}, 'package_user_weight_idx'),
+            ({'name': 'Package12'}, 'package_user_name_like_idx'),
+            ({'name__startswith': 'Package12'}, 'package_user_name_like_idx'),
+        ]
+
+        for params, index_name in cases:
+            with self.subTest(params=params):
+                self.assertUsesIndex(
+                    filter_queryset(PackageViewSet, packages, params),
+                    index_name,
+                )
@@ -0,0 +1,168 @@
+"""
+Tests for idempotent requests.
+"""
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import IdempotencyKey, Package, Robot
+from robot.serializers import RobotAddSerializer
+
+
+def load_package_url(robot_sn):
+    """Create and return a robot load-package URL."""
+    return reverse('robot:robot-load-package', args=[robot_sn])
+
+
+class IdempotentLoadPackageTests(TestCase):
+    """Test retrying load_package with an Idempotency-Key."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(self.user)
+        self.robot = Robot.objects.create(
+            user=self.user,
+            serial_number='Test1',
+            robot_model=3,
+        )
+        Package.objects.create(
+            user=self.user, code='TEST1', name='Testing', weight=100,
+        )
+        self.url = load_package_url(self.robot.serial_number)
+
+    def load(self, key, packages=('TEST1',)):
+        return self.client.post(
+            self.url,
+            {'packages': list(packages)},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_response(self):
+        """Test a retry gets the first response without loading again."""
+        first = self.load('key-1')
+
+        with self.assertNumQueries(0):
+            retry = self.load('key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.robot.refresh_from_db()
+        self.assertEqual(self.robot.weight_limit, 400)
+
+    def test_retry_during_request_conflicts(self):
+        """Test a retry sent while the first request runs is turned away."""
+        retries = []
+        save = RobotAddSerializer.save
+
+        def save_after_retry(serializer, *args, **kwargs):
+            retries.append(self.load('key-1'))
+            return save(serializer, *args, **kwargs)
+
+        with patch.object(RobotAddSerializer, 'save', save_after_retry):
+            first = self.load('key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retries[0].status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(retries[0]['Retry-After'], '1')
+        retry = self.load('key-1')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_key_released_after_error(self):
+        """Test a request that raised leaves the key free for a retry."""
+        with patch.object(
+            RobotAddSerializer,
+            'save',
+            side_effect=RuntimeError,
+        ), self.assertRaises(RuntimeError):
+            self.load('key-1')
+
+        res = self.load('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retry_replays_from_database(self):
+        """Test the database answers once the cache lost the response."""
+        first = self.load('key-1')
+        cache.clear()
+
+        retry = self.load('key-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_retry_without_key_fails(self):
+        """Test a retry without a key still runs the load."""
+        self.load('key-1')
+
+        res = self.client.post(
+            self.url,
+            {'packages': ['TEST1']},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_for_other_request(self):
+        """Test reusing a key with another payload is rejected."""
+        Package.objects.create(
+            user=self.user, code='TEST2', name='Testing', weight=100,
+        )
+        self.load('key-1')
+
+        res = self.load('key-1', packages=['TEST2'])
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(self.robot.packages.filter(code='TEST2').exists())
+
+    def test_keys_scoped_to_user(self):
+        """Test another user's key does not replay."""
+        self.load('key-1')
+        other_user = get_user_model().objects.create_user(
+            email='test2@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.load('key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_key_too_long(self):
+        """Test an oversized key is rejected."""
+        res = self.load('k' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.robot.packages.exists())
+
+    def test_expired_key_cleared(self):
+        """Test the command deletes keys past the TTL."""
+        self.load('key-1')
+        self.load('key-2', packages=[])
+        IdempotencyKey.objects.filter(key='key-1').update(
+            created_at=timezone.now() - timedelta(days=2),
+        )
+
+        call_command('clear_idempotency_keys', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list('key', flat=True)),
+            ['key-2'],
+        )
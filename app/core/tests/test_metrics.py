@@ -0,0 +1,205 @@
+"""
+Tests for the metrics endpoint.
+"""
+import json
+import os
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.metrics import Counter, Histogram, Registry
+from core.models import Package, Robot
+
+
+METRICS_URL = reverse('metrics')
+ROBOTS_URL = reverse('robot:robot-list')
+
+
+def metric_lines(res, name):
+    """Return the lines of `name` in a metrics response."""
+    return [
+        line for line in res.content.decode().splitlines()
+        if line.startswith(name)
+    ]
+
+
+class RegistryTests(TestCase):
+    """Test aggregating metrics."""
+
+    def test_histogram_buckets(self):
+        """Test observations are counted in cumulative buckets."""
+        registry = Registry()
+        histogram = Histogram(registry, 'latency', 'Latency.', ['view'],
+                              buckets=[0.1, 1])
+        histogram.observe(0.05, view='a')
+        histogram.observe(0.5, view='a')
+        histogram.observe(5, view='a')
+
+        self.assertEqual(registry.render(), [
+            '# HELP latency Latency.',
+            '# TYPE latency histogram',
+            'latency_bucket{view="a",le="0.1"} 1',
+            'latency_bucket{view="a",le="1.0"} 2',
+            'latency_bucket{view="a",le="+Inf"} 3',
+            'latency_sum{view="a"} 5.55',
+            'latency_count{view="a"} 3',
+        ])
+
+    def test_processes_aggregated(self):
+        """Test the values written by every process are summed."""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            other = Registry()
+            Counter(other, 'hits', 'Hits.').inc(2)
+            other.flush()
+            # A second process is simulated by a file of another pid.
+            os.rename(
+                os.path.join(directory, f'{os.getpid()}.json'),
+                os.path.join(directory, '1.json'),
+            )
+            registry = Registry()
+            Counter(registry, 'hits', 'Hits.').inc(3)
+
+            lines = registry.render()
+
+        self.assertIn('hits_total 5.0', lines)
+
+    def test_exited_process_archived(self):
+        """Test the file of an exited process is merged into the archive."""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            registry = Registry()
+            hits = Counter(registry, 'hits', 'Hits.')
+            for pid in [1, 2]:
+                with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                    json.dump({'hits': [[[], pid]]}, f)
+                registry.archive(pid)
+            registry.archive(3)
+            hits.inc(4)
+
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                ['.lock', 'archive.json'],
+            )
+            lines = registry.render()
+
+        self.assertIn('hits_total 7.0', lines)
+
+    def test_concurrent_flushes(self):
+        """Test threads of one process can flush at the same time."""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            registry = Registry()
+            Counter(registry, 'hits', 'Hits.').inc()
+            errors = []
+
+            def flush():
+                try:
+                    for _ in range(50):
+                        registry.flush()
+                except OSError as exc:
+                    errors.append(exc)
+
+            threads = [threading.Thread(target=flush) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsAPITests(TestCase):
+    """Test the `/metrics` endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        cache.clear()
+
+    def test_scrape_forbidden(self):
+        """Test the metrics are not served without the token."""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer wrong')
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_staff_scrape(self):
+        """Test staff users can read the metrics without the token."""
+        self.client.credentials()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_request_metrics(self):
+        """Test API requests are recorded per view and action."""
+        self.client.force_authenticate(self.user)
+        self.client.get(ROBOTS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res['Content-Type'].split(';')[0], 'text/plain')
+        self.assertTrue(any(
+            'view="RobotViewSet",action="list",method="GET",status="200"'
+            in line
+            for line in metric_lines(res, 'api_request_duration_seconds')
+        ))
+        self.assertTrue(any(
+            line.startswith(
+                'api_db_queries_total{view="RobotViewSet",action="list"}'
+            )
+            for line in metric_lines(res, 'api_db_queries_total')
+        ))
+
+    def test_fleet_gauges(self):
+        """Test the fleet gauges are computed from the robots."""
+        robot = Robot.objects.create(
+            user=self.user,
+            serial_number='Test1',
+            battery=40,
+            state=Robot.ROBOT_STATUS.ldd,
+        )
+        Robot.objects.create(user=self.user, serial_number='Test2')
+        robot.packages.add(Package.objects.create(
+            user=self.user,
+            code='TEST1',
+            name='Package-1',
+            weight=30,
+        ))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(METRICS_URL)
+        with self.assertNumQueries(0):
+            self.client.get(METRICS_URL)
+
+        self.assertIn('fleet_robots{state="Idle"} 1.0', metric_lines(
+            res,
+            'fleet_robots',
+        ))
+        self.assertIn('fleet_robots{state="Loaded"} 1.0', metric_lines(
+            res,
+            'fleet_robots',
+        ))
+        self.assertIn('fleet_battery_average 70.0', metric_lines(
+            res,
+            'fleet_battery_average',
+        ))
+        self.assertIn('fleet_loaded_weight 30.0', metric_lines(
+            res,
+            'fleet_loaded_weight',
+        ))
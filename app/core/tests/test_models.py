@@ -2,6 +2,7 @@
 Tests for models.
 """
 from unittest.mock import patch
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -90,6 +91,19 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(package), package.name)
 
+    def test_package_on_one_robot(self):
+        """Test a package cannot be loaded into two robots."""
+        user = create_user()
+        package = create_package(user, 'TESTING_1')
+        robots = [
+            models.Robot.objects.create(user=user, serial_number=f'Test{i}')
+            for i in range(2)
+        ]
+        robots[0].packages.add(package)
+
+        with self.assertRaises(IntegrityError):
+            robots[1].packages.add(package)
+
     @patch('core.models.uuid.uuid4')
     def test_package_file_name_uuid(self, mock_uuid):
         """Test generating image path."""
@@ -0,0 +1,143 @@
+"""
+Tests for partitioning the tenant tables by user.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from core.models import Package, Robot, RobotPackage
+from core.partitioning import PARTITIONED_TABLES, is_partitioned, \
+    partition_by_user
+
+
+def create_user(email='test@example.com'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(
+        email=email,
+        password='12345678',
+    )
+
+
+class PartitioningTests(TestCase):
+    """Test hash partitioning robots and packages by user."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.robot = Robot.objects.create(
+            user=self.user,
+            serial_number='Test1',
+        )
+        self.package = Package.objects.create(
+            user=self.user,
+            code='TEST_1',
+            name='Package-1',
+            weight=10,
+        )
+        self.robot.packages.add(self.package)
+
+        partition_by_user(connection, 4)
+
+    def test_tables_partitioned(self):
+        """Test the tenant tables become partitioned tables."""
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                self.assertTrue(is_partitioned(cursor, table))
+
+    def test_rows_kept(self):
+        """Test existing rows and relations survive partitioning."""
+        robot = Robot.objects.get(user=self.user, serial_number='Test1')
+
+        self.assertEqual(robot.pk, self.robot.pk)
+        self.assertEqual(list(robot.packages.all()), [self.package])
+
+    def test_create_after_partitioning(self):
+        """Test new rows get ids from the existing sequence."""
+        robot = Robot.objects.create(user=self.user, serial_number='Test2')
+
+        self.assertGreater(robot.pk, self.robot.pk)
+        robot.packages.add(
+            Package.objects.create(
+                user=self.user,
+                code='TEST_2',
+                name='Package-2',
+                weight=10,
+            )
+        )
+        self.assertEqual(robot.packages.count(), 1)
+
+    def test_serial_number_unique_across_users(self):
+        """Test serial numbers stay unique across users."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Robot.objects.create(
+                user=create_user('other@example.com'),
+                serial_number='Test1',
+            )
+
+    def test_code_unique_across_users(self):
+        """Test package codes stay unique across users."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Package.objects.create(
+                user=create_user('other@example.com'),
+                code='TEST_1',
+                name='Package-1',
+                weight=10,
+            )
+
+    def test_renamed_serial_number_released(self):
+        """Test a serial number can be reused once renamed or deleted."""
+        self.robot.serial_number = 'Test2'
+        self.robot.save()
+        other = Robot.objects.create(user=self.user, serial_number='Test1')
+        other.delete()
+
+        Robot.objects.create(
+            user=create_user('other@example.com'),
+            serial_number='Test1',
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Robot.objects.create(user=self.user, serial_number='Test2')
+
+    def test_loaded_package_references_checked(self):
+        """Test loaded packages must reference a robot of their user."""
+        package = Package.objects.create(
+            user=self.user,
+            code='TEST_2',
+            name='Package-2',
+            weight=10,
+        )
+        other_robot = Robot.objects.create(
+            user=create_user('other@example.com'),
+            serial_number='Test2',
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RobotPackage.objects.create(
+                user=self.user,
+                robot=other_robot,
+                package=package,
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_deleted_package_cannot_stay_loaded(self):
+        """Test deleting a loaded package in SQL fails."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM core_package WHERE id = %s',
+                    [self.package.pk],
+                )
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_tenant_query_pruned(self):
+        """Test a query for one user scans a single partition."""
+        plan = Robot.objects.filter(user=self.user).explain()
+
+        self.assertEqual(plan.count('core_robot_p'), 1)
+
+    def test_loaded_query_pruned(self):
+        """Test loaded packages of one user are in a single partition."""
+        plan = RobotPackage.objects.filter(user=self.user).explain()
+
+        self.assertEqual(plan.count('core_robot_packages_p'), 1)
@@ -0,0 +1,158 @@
+"""
+Tests for request profiling.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.profiling import collapse_stats, profile_endpoint
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+
+
+def leaf():
+    """Spin for a moment."""
+    return sum(range(20000))
+
+
+def branch():
+    """Call the leaf twice."""
+    return leaf() + leaf()
+
+
+class CollapseStatsTests(SimpleTestCase):
+    """Test converting profiles to collapsed stacks."""
+
+    def test_collapse_stats(self):
+        """Test the time of callees is found under their callers."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        branch()
+        profiler.disable()
+
+        stacks = collapse_stats(pstats.Stats(profiler))
+
+        leaf_stacks = [stack for stack in stacks if stack.endswith(
+            f'leaf (test_profiling.py:{leaf.__code__.co_firstlineno})'
+        )]
+        self.assertEqual(len(leaf_stacks), 1)
+        self.assertRegex(
+            leaf_stacks[0],
+            r'branch \(test_profiling\.py:\d+\);leaf \(',
+        )
+        self.assertGreater(stacks[leaf_stacks[0]], 0)
+
+    def test_profile_endpoint(self):
+        """Test the endpoint is read back from the file name."""
+        self.assertEqual(
+            profile_endpoint('RobotViewSet.list.1700000000-42.prof'),
+            'RobotViewSet.list',
+        )
+
+
+class ProfilingAPITests(TestCase):
+    """Test profiling API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(
+            PROFILING_ENABLED=True,
+            PROFILING_ROOT=self.directory.name,
+            PROFILING_MAX_FILES=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_profile_request(self):
+        """Test a profile is saved under the view and action."""
+        res = self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertTrue(res['X-Profile'].startswith('RobotViewSet.list.'))
+        self.assertEqual(os.listdir(self.directory.name), [res['X-Profile']])
+
+    def test_profile_query_param(self):
+        """Test `?profile=1` profiles the request."""
+        res = self.client.get(ROBOTS_URL, {'profile': '1'})
+
+        self.assertIn('X-Profile', res)
+
+    def test_profile_staff_only(self):
+        """Test requests of other users are not profiled."""
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile', res)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_profiling_disabled(self):
+        """Test nothing is profiled unless profiling is enabled."""
+        res = self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile', res)
+
+    def test_profiles_capped(self):
+        """Test only the newest profiles are kept."""
+        for _ in range(3):
+            self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_trim_profile_already_removed(self):
+        """Test profiles trimmed by another worker meanwhile are skipped."""
+        for _ in range(2):
+            self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+        remove = os.remove
+
+        def remove_twice(path):
+            remove(path)
+            remove(path)
+
+        with patch('core.profiling.os.remove', side_effect=remove_twice):
+            res = self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_profile_stacks(self):
+        """Test stored profiles are aggregated per endpoint."""
+        self.client.get(ROBOTS_URL, HTTP_X_PROFILE='1')
+        self.client.get(
+            reverse('package:package-list'),
+            HTTP_X_PROFILE='1',
+        )
+        out = io.StringIO()
+
+        call_command(
+            'profile_stacks',
+            endpoint='RobotViewSet.list',
+            stdout=out,
+            stderr=io.StringIO(),
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, value = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('RobotViewSet.list;'))
+            self.assertGreater(int(value), 0)
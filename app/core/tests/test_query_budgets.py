@@ -0,0 +1,66 @@
+"""
+Tests for the query budget middleware.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.middleware import QueryBudgetExceeded
+from core.models import Robot
+from robot.views import RobotViewSet
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+
+
+@patch.dict(RobotViewSet.query_budgets, {'list': 1, 'export': 0})
+class QueryBudgetMiddlewareTests(TestCase):
+    """Test requests over their query budget."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(self.user)
+        Robot.objects.create(user=self.user, serial_number='Test1')
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_over_budget_raises(self):
+        """Test a request over budget raises in `raise` mode."""
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded,
+            'RobotViewSet.list made 2 queries, its budget is 1.',
+        ):
+            self.client.get(ROBOTS_URL)
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_over_budget_logged(self):
+        """Test a request over budget is logged in `log` mode."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            res = self.client.get(ROBOTS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('RobotViewSet.list', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_within_budget(self):
+        """Test actions within their budget pass."""
+        res = self.client.get(reverse('robot:robot-fits'), {'weight': 10})
+
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_streaming_checked_when_sent(self):
+        """Test the queries of a streamed body count against its budget."""
+        res = self.client.get(reverse('robot:robot-export'))
+
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded,
+            'RobotViewSet.export made 1 queries, its budget is 0.',
+        ):
+            b''.join(res.streaming_content)
@@ -0,0 +1,96 @@
+"""
+Tests for the API renderers and parsers.
+"""
+import io
+import json
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Robot
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+
+
+class RendererTests(SimpleTestCase):
+    """Test rendering and parsing."""
+
+    def test_orjson_matches_json_renderer(self):
+        """Test orjson renders the same document as the JSON renderer."""
+        data = {'state': _('Idle'), 'battery': 100, 'text': 'a b'}
+
+        content = ORJSONRenderer().render(data)
+
+        self.assertEqual(content, JSONRenderer().render(data))
+
+    def test_orjson_indent(self):
+        """Test an indented media type is pretty printed."""
+        content = ORJSONRenderer().render(
+            {'battery': 100},
+            'application/json; indent=2',
+        )
+
+        self.assertEqual(content, b'{\n  "battery": 100\n}')
+
+    def test_orjson_parser_error(self):
+        """Test malformed JSON raises a parse error."""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"battery":'))
+
+
+class MessagePackAPITests(TestCase):
+    """Test MessagePack requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_msgpack(self):
+        """Test listing robots as MessagePack."""
+        Robot.objects.create(user=self.user, serial_number='Test1')
+
+        res = self.client.get(ROBOTS_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        robots = msgpack.unpackb(res.content)
+        self.assertEqual(robots[0]['serial_number'], 'Test1')
+        self.assertEqual(robots[0]['state'], 'Idle')
+
+    def test_create_msgpack(self):
+        """Test creating a robot from a MessagePack body."""
+        payload = {'serial_number': 'Test1', 'robot_model': 2}
+
+        res = self.client.post(
+            ROBOTS_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(res.content)['serial_number'], 'Test1')
+        self.assertTrue(Robot.objects.filter(serial_number='Test1').exists())
+
+    def test_msgpack_unhashable_key(self):
+        """Test a MessagePack map keyed by a list is a parse error."""
+        res = self.client.post(
+            ROBOTS_URL,
+            b'\x81\x90\x01',
+            content_type='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
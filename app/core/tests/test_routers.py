@@ -0,0 +1,205 @@
+"""
+Tests for the database routers.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import PrimaryPinningMiddleware
+from core.models import Robot
+from core.routers import PrimaryReplicaRouter, unpin_primary
+
+
+REPLICA = 'replica_0'
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Test routing between the primary and the replicas."""
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        unpin_primary()
+
+    def tearDown(self):
+        unpin_primary()
+
+    def test_read_from_replica(self):
+        """Test reads go to a replica by default."""
+        self.assertEqual(self.router.db_for_read(Robot), 'replica_0')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_read_without_replicas(self):
+        """Test reads go to the primary when there are no replicas."""
+        self.assertEqual(self.router.db_for_read(Robot), 'default')
+
+    def test_write_pins_reads_to_primary(self):
+        """Test reads after a write go to the primary."""
+        self.assertEqual(self.router.db_for_write(Robot), 'default')
+        self.assertEqual(self.router.db_for_read(Robot), 'default')
+
+    def test_read_in_transaction_from_primary(self):
+        """Test reads inside a transaction go to the primary."""
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Robot), 'default')
+
+    def test_migrate_only_primary(self):
+        """Test only the primary is migrated."""
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class PrimaryPinningMiddlewareTests(SimpleTestCase):
+    """Test pinning requests to the primary."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.read_from = None
+        cache.clear()
+
+    def get_response(self, request):
+        """Record where the view reads from."""
+        self.read_from = self.router.db_for_read(Robot)
+        return HttpResponse()
+
+    def test_safe_request_reads_from_replica(self):
+        """Test a GET request reads from a replica."""
+        middleware = PrimaryPinningMiddleware(self.get_response)
+        res = middleware(self.factory.get('/api/robot/'))
+
+        self.assertEqual(self.read_from, 'replica_0')
+        self.assertNotIn('pin_primary', res.cookies)
+
+    def test_unsafe_request_pins_client(self):
+        """Test a POST request reads from the primary and sets the cookie."""
+        middleware = PrimaryPinningMiddleware(self.get_response)
+        res = middleware(self.factory.post('/api/robot/'))
+
+        self.assertEqual(self.read_from, 'default')
+        self.assertIn('pin_primary', res.cookies)
+
+    def test_write_in_safe_request_pins_client(self):
+        """Test a GET request that writes sets the cookie."""
+        def get_response(request):
+            self.router.db_for_write(Robot)
+            return HttpResponse()
+
+        middleware = PrimaryPinningMiddleware(get_response)
+        res = middleware(self.factory.get('/api/robot/'))
+
+        self.assertIn('pin_primary', res.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        """Test a GET request after a write reads from the primary."""
+        middleware = PrimaryPinningMiddleware(self.get_response)
+        request = self.factory.get('/api/robot/')
+        request.COOKIES['pin_primary'] = '1'
+        middleware(request)
+
+        self.assertEqual(self.read_from, 'default')
+
+    def test_unsafe_request_pins_credentials(self):
+        """Test a POST with a token pins the token instead of a cookie."""
+        middleware = PrimaryPinningMiddleware(self.get_response)
+        res = middleware(self.factory.post(
+            '/api/robot/',
+            HTTP_AUTHORIZATION='Token abc',
+        ))
+
+        self.assertNotIn('pin_primary', res.cookies)
+        middleware(self.factory.get(
+            '/api/robot/',
+            HTTP_AUTHORIZATION='Token abc',
+        ))
+        self.assertEqual(self.read_from, 'default')
+
+    def test_pinned_credentials_only_pin_their_client(self):
+        """Test a write with one token does not pin other tokens."""
+        middleware = PrimaryPinningMiddleware(self.get_response)
+        middleware(self.factory.post(
+            '/api/robot/',
+            HTTP_AUTHORIZATION='Token abc',
+        ))
+        middleware(self.factory.get(
+            '/api/robot/',
+            HTTP_AUTHORIZATION='Token other',
+        ))
+
+        self.assertEqual(self.read_from, 'replica_0')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaDatabaseTests(SimpleTestCase):
+    """Test pinning with a second database configured as the replica."""
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Added once the test databases exist, the runner does not create
+        # a test database for it.
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        with connections[REPLICA].schema_editor() as editor:
+            editor.create_model(Robot)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        self.middleware = PrimaryPinningMiddleware(self.get_response)
+        self.read_from = None
+        self.now = 1000.0
+        cache.clear()
+        clock = patch(
+            'django.core.cache.backends.locmem.time.time',
+            lambda: self.now,
+        )
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def get_response(self, request):
+        """Read the robots from the database the router picks."""
+        robots = Robot.objects.all()
+        list(robots)
+        self.read_from = robots.db
+        return HttpResponse()
+
+    def request(self, method):
+        """Send a request with a token at the current time."""
+        return self.middleware(
+            getattr(RequestFactory(), method)(
+                '/api/robot/',
+                HTTP_AUTHORIZATION='Token abc',
+            )
+        )
+
+    def test_read_from_replica_database(self):
+        """Test safe requests read from the replica database."""
+        self.request('get')
+
+        self.assertEqual(self.read_from, REPLICA)
+
+    def test_pinned_read_does_not_extend_pin(self):
+        """Test reads of a pinned client leave the pin to expire."""
+        self.request('post')
+        self.now += 3
+        self.request('get')
+        self.assertEqual(self.read_from, 'default')
+
+        self.now += 3
+        self.request('get')
+
+        self.assertEqual(self.read_from, REPLICA)
@@ -0,0 +1,118 @@
+"""
+Tests for the precomputed OpenAPI schema.
+"""
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaTests(SimpleTestCase):
+    """Test generating and serving the schema."""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            API_SCHEMA_ROOT=self.root.name,
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.root.cleanup()
+
+    def test_generate_schema(self):
+        """Test generating the schema writes every format."""
+        call_command('generate_schema', stdout=StringIO())
+
+        for file_name in ['schema.json', 'schema.json.gz', 'schema.yaml']:
+            self.assertTrue(
+                os.path.exists(os.path.join(self.root.name, file_name))
+            )
+
+    def test_generate_schema_up_to_date(self):
+        """Test the schema is not regenerated when sources are unchanged."""
+        call_command('generate_schema', stdout=StringIO())
+        out = StringIO()
+        call_command('generate_schema', stdout=out)
+
+        self.assertIn('up to date', out.getvalue())
+
+    def test_serve_schema_with_etag(self):
+        """Test the stored schema is served with an ETag."""
+        call_command('generate_schema', stdout=StringIO())
+
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/api/robot/', json.loads(res.content)['paths'])
+        self.assertTrue(res.has_header('ETag'))
+
+    def test_serve_schema_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        call_command('generate_schema', stdout=StringIO())
+        res = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    def test_serve_schema_gzip(self):
+        """Test the precompressed schema is served to gzip clients."""
+        call_command('generate_schema', stdout=StringIO())
+
+        res = self.client.get(
+            SCHEMA_URL,
+            HTTP_ACCEPT='application/vnd.oai.openapi+json',
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('paths', json.loads(gzip.decompress(res.content)))
+
+    def test_serve_schema_gzip_refused(self):
+        """Test gzip is not used when its quality is zero."""
+        call_command('generate_schema', stdout=StringIO())
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_serve_schema_not_modified_weak_etag(self):
+        """Test a schema compressed by the middleware can still be 304."""
+        call_command('generate_schema', stdout=StringIO())
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='br, zstd')
+        self.assertTrue(res['ETag'].startswith('W/'))
+
+        res = self.client.get(
+            SCHEMA_URL,
+            HTTP_ACCEPT_ENCODING='br, zstd',
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+
+        self.assertEqual(res.status_code, 304)
+
+    @override_settings(ENABLE_API_DOCS=False)
+    def test_generate_schema_docs_disabled(self):
+        """Test no schema is generated when the docs are disabled."""
+        out = StringIO()
+        call_command('generate_schema', stdout=out)
+
+        self.assertIn('disabled', out.getvalue())
+        self.assertEqual(os.listdir(self.root.name), [])
+
+    def test_serve_live_schema_without_file(self):
+        """Test the schema is generated live when none is stored."""
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(res.has_header('ETag'))
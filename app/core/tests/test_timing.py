@@ -0,0 +1,114 @@
+"""
+Tests for request timing.
+"""
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Robot
+from core.timing import RequestQueries, RequestTiming, slow_query_log
+from robot.views import RobotViewSet
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+EXPORT_URL = reverse('robot:robot-export')
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingTests(TestCase):
+    """Test the Server-Timing middleware."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        self.client.force_authenticate(self.user)
+        Robot.objects.create(user=self.user, serial_number='Test1')
+        slow_query_log.clear()
+
+    def test_server_timing_header(self):
+        """Test the phases of a request are sent in the header."""
+        with self.assertLogs('core.timing', 'INFO'):
+            res = self.client.get(ROBOTS_URL)
+
+        self.assertEqual(
+            re.findall(r'(\w+);dur=', res['Server-Timing']),
+            ['db', 'serializer', 'app', 'render', 'total'],
+        )
+        self.assertIn('desc="2 queries"', res['Server-Timing'])
+
+    def test_log_line(self):
+        """Test a JSON line is logged for the request."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(ROBOTS_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['endpoint'], 'robot:robot-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 2)
+        self.assertGreaterEqual(record['total_ms'], record['db_ms'])
+
+    def test_serializer_timed(self):
+        """Test the time of the serializers is logged on its own."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(ROBOTS_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['serializer_ms'], 0)
+
+    def test_serializer_keeps_class(self):
+        """Test a timed serializer is not swapped for another class."""
+        request = APIRequestFactory().get(ROBOTS_URL)
+        request.server_timing = RequestTiming(RequestQueries())
+        view = RobotViewSet(
+            request=Request(request),
+            action='list',
+            format_kwarg=None,
+        )
+
+        serializer = view.get_serializer(Robot.objects.all(), many=True)
+        serializer.data
+
+        self.assertIs(type(serializer), ListSerializer)
+        self.assertGreater(request.server_timing.serializer, 0)
+
+    def test_streaming_timed_until_sent(self):
+        """Test a streamed export is logged once its body is sent."""
+        with self.assertNoLogs('core.timing', 'INFO'):
+            res = self.client.get(EXPORT_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            b''.join(res.streaming_content)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['endpoint'], 'robot:robot-export')
+        # The rows are only queried while the body streams.
+        self.assertEqual(record['queries'], 1)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Test requests are not timed when sampling is off."""
+        res = self.client.get(ROBOTS_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING_SLOW_QUERY_MS=0)
+    def test_slow_queries(self):
+        """Test slow queries are kept once per endpoint."""
+        with self.assertLogs('core.timing', 'WARNING') as logs:
+            self.client.get(ROBOTS_URL)
+            self.client.get(ROBOTS_URL)
+
+        top = slow_query_log.top('robot:robot-list')
+        self.assertEqual(len(top), 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('core_robot', top[0][1] + top[1][1])
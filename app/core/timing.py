@@ -0,0 +1,199 @@
+"""
+Timing of the phases of a request.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueries:
+    """
+    Count and time of the queries of one request.
+
+    `RequestQueriesMiddleware` installs an instance as an execute wrapper
+    on the connections until the response is sent, which for a streaming
+    response is once its body is, and then calls the `on_finish`
+    callbacks.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slow = []
+        self._callbacks = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.duration += duration
+            self.count += 1
+            if duration * 1000 >= settings.SERVER_TIMING_SLOW_QUERY_MS:
+                self.slow.append((duration, sql))
+
+    def on_finish(self, callback):
+        """Call `callback(response)` once the response is sent."""
+        self._callbacks.append(callback)
+
+    def finish(self, response):
+        """Call every callback, then raise the first error they raised."""
+        callbacks, self._callbacks = self._callbacks, []
+        errors = []
+        for callback in callbacks:
+            try:
+                callback(response)
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
+
+class RequestTiming:
+    """
+    Time spent by one request in the database, serializers, the view and
+    rendering, from the queries counted by `RequestQueries`.
+    """
+
+    def __init__(self, queries):
+        self.queries = queries
+        self.start = time.perf_counter()
+        self.endpoint = None
+        self.serializer = 0.0
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+        self.end = None
+
+    @contextmanager
+    def serializing(self):
+        """Count the time of the block as serializer time."""
+        start = time.perf_counter()
+        db = self.queries.duration
+        try:
+            yield
+        finally:
+            # Lazy querysets run in serializers, their queries are db time.
+            self.serializer += max(
+                time.perf_counter() - start - (self.queries.duration - db),
+                0,
+            )
+
+    def timed(self, to_representation):
+        """Return `to_representation` counting its time as serializer time."""
+
+        @functools.wraps(to_representation)
+        def timed_to_representation(instance):
+            with self.serializing():
+                return to_representation(instance)
+
+        return timed_to_representation
+
+    def rendered(self, response):
+        """Post render callback marking the end of rendering."""
+        self.render_end = time.perf_counter()
+
+    def metrics(self):
+        """Return the duration of each phase in milliseconds."""
+        end = self.end or time.perf_counter()
+        view_end = self.view_end or end
+        db = self.queries.duration
+        metrics = {'db': db * 1000}
+        if self.view_start is not None:
+            metrics['serializer'] = self.serializer * 1000
+            metrics['app'] = max(
+                view_end - self.view_start - db - self.serializer,
+                0,
+            ) * 1000
+        if self.render_end is not None:
+            metrics['render'] = (self.render_end - view_end) * 1000
+        metrics['total'] = (end - self.start) * 1000
+
+        return metrics
+
+    def header(self):
+        """Return the value of the `Server-Timing` header."""
+        descriptions = {'db': f'{self.queries.count} queries'}
+
+        return ', '.join(
+            f'{name};dur={duration:.2f}' + (
+                f';desc="{descriptions[name]}"'
+                if name in descriptions else ''
+            )
+            for name, duration in self.metrics().items()
+        )
+
+    def log(self, request, response):
+        """Log the timing of the request as a JSON line."""
+        logger.info(json.dumps({
+            'endpoint': self.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': self.queries.count,
+            **{
+                f'{name}_ms': round(duration, 2)
+                for name, duration in self.metrics().items()
+            },
+        }))
+
+
+class SlowQueryLog:
+    """
+    The slowest queries of each endpoint in this process.
+
+    Queries are kept by their SQL before parameters are bound, so a query
+    repeated with other parameters is one entry. A query is logged when it
+    enters the top `SERVER_TIMING_SLOW_QUERIES` of its endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, endpoint, queries):
+        """Record the slow `queries` of a request to `endpoint`."""
+        size = settings.SERVER_TIMING_SLOW_QUERIES
+        with self._lock:
+            top = self._queries.setdefault(endpoint, {})
+            for duration, sql in queries:
+                if sql in top:
+                    top[sql] = max(top[sql], duration)
+                    continue
+                if len(top) >= size:
+                    fastest = min(top, key=top.get)
+                    if top[fastest] >= duration:
+                        continue
+                    del top[fastest]
+                top[sql] = duration
+                logger.warning(json.dumps({
+                    'endpoint': endpoint,
+                    'slow_query_ms': round(duration * 1000, 2),
+                    'sql': sql,
+                }))
+
+    def top(self, endpoint):
+        """Return the slowest queries of `endpoint`, slowest first."""
+        with self._lock:
+            top = self._queries.get(endpoint, {})
+            return sorted(
+                ((duration, sql) for sql, duration in top.items()),
+                reverse=True,
+            )
+
+    def clear(self):
+        """Forget every recorded query."""
+        with self._lock:
+            self._queries.clear()
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,254 @@
+"""
+Views shared by the whole API.
+"""
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.http import HttpResponse, HttpResponseForbidden, \
+    HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+
+from core.metrics import registry, render_fleet
+from core.middleware import parse_accept_encoding
+from core.profiling import save_profile, wants_profile
+from core.schema import SCHEMA_FORMATS, load_schema
+
+
+_live_schema_view = None
+
+
+def get_schema_format(request):
+    """Return the schema format negotiated with the client."""
+    schema_format = request.GET.get('format')
+    if schema_format in SCHEMA_FORMATS:
+        return schema_format
+    if 'json' in request.META.get('HTTP_ACCEPT', ''):
+        return 'json'
+
+    return 'yaml'
+
+
+@require_safe
+def schema_view(request):
+    """Serve the schema precomputed by `manage.py generate_schema`."""
+    global _live_schema_view
+
+    schema = load_schema(settings.API_SCHEMA_ROOT)
+    if schema is None:
+        if _live_schema_view is None:
+            from drf_spectacular.views import SpectacularAPIView
+            _live_schema_view = SpectacularAPIView.as_view()
+        return _live_schema_view(request)
+
+    meta, contents = schema
+    schema_format = get_schema_format(request)
+    content, gzip_content = contents[schema_format]
+    etag = meta['formats'][schema_format]['etag']
+
+    codings = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''),
+    )
+    use_gzip = codings.get('gzip', codings.get('*', 0.0)) > 0
+    if use_gzip:
+        etag = f'"{etag}-gzip"'
+        content = gzip_content
+    else:
+        etag = f'"{etag}"'
+
+    # The compression middleware weakens the ETag of the responses it
+    # compresses, so the validators are compared weakly.
+    if etag in (
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            content,
+            content_type=SCHEMA_FORMATS[schema_format],
+        )
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+
+    return response
+
+
+def can_scrape(request):
+    """
+    Return whether `request` may read the metrics: it sends the bearer
+    token `METRICS_TOKEN` or comes from a staff user.
+    """
+    token = settings.METRICS_TOKEN
+    credentials = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(
+        credentials.encode(),
+        f'Bearer {token}'.encode(),
+    ):
+        return True
+
+    return request.user.is_staff
+
+
+@require_safe
+def metrics_view(request):
+    """Serve the metrics of the API and the fleet for Prometheus."""
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+
+    lines = registry.render() + render_fleet()
+
+    return HttpResponse(
+        '\n'.join(lines) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+class SparseFieldsetsMixin:
+    """
+    Let clients pick the fields of read endpoints with `?fields=` or
+    `?exclude=`.
+
+    The projection reaches the queryset: only the columns behind the
+    requested fields are selected and many-to-many fields are prefetched
+    only when requested.
+    """
+    sparse_fieldsets_actions = ['list', 'retrieve']
+
+    def get_requested_fields(self):
+        """Return the requested field names, or None for all of them."""
+        if self.action not in self.sparse_fieldsets_actions:
+            return None
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        params = self.request.query_params
+        available = list(self.get_serializer_class()().fields)
+        requested = None
+        if params.get('fields'):
+            requested = self._parse_fields('fields', available)
+        if params.get('exclude'):
+            excluded = self._parse_fields('exclude', available)
+            requested = [
+                name for name in requested or available
+                if name not in excluded
+            ]
+
+        self._requested_fields = requested
+        return requested
+
+    def _parse_fields(self, param, available):
+        names = [
+            name.strip()
+            for name in self.request.query_params[param].split(',')
+            if name.strip()
+        ]
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({
+                param: f'Unknown fields {unknown}, '
+                       f'the available fields are {available}.'
+            })
+        return names
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer restricted to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def project_queryset(self, queryset):
+        """Select only what the requested fields need."""
+        fields = self.get_requested_fields()
+        serializer_fields = self.get_serializer_class()().fields
+        columns, prefetch = [queryset.model._meta.pk.name], []
+
+        for name in fields or serializer_fields:
+            source = serializer_fields[name].source
+            if source.startswith('get_') and source.endswith('_display'):
+                source = source[len('get_'):-len('_display')]
+            try:
+                model_field = queryset.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                return queryset
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.append(source)
+            else:
+                columns.append(source)
+
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if fields is not None:
+            queryset = queryset.only(*columns)
+
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Project the queryset of read actions."""
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.sparse_fieldsets_actions:
+            queryset = self.project_queryset(queryset)
+
+        return queryset
+
+
+class ProfilingMixin:
+    """
+    Let staff users profile a request with `X-Profile: 1` or `?profile=1`.
+
+    With `PROFILING_ENABLED`, the handler and its serializers run under
+    cProfile. The stats are saved in `PROFILING_ROOT` under the name of
+    the view and action, which is returned in the `X-Profile` header.
+    """
+    _profiler = None
+
+    def initial(self, request, *args, **kwargs):
+        """Start profiling once the user is authenticated."""
+        super().initial(request, *args, **kwargs)
+        if wants_profile(request):
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Stop profiling and save the stats of the request."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            action = getattr(self, 'action', None) or request.method.lower()
+            response['X-Profile'] = save_profile(
+                self._profiler,
+                f'{type(self).__name__}.{action}',
+            )
+            self._profiler = None
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ServerTimingMixin:
+    """
+    Time the serializers of requests timed by `ServerTimingMiddleware`.
+
+    The `to_representation` of the serializer is wrapped on the instance,
+    so `data` is reported as the `serializer` phase without the queries it
+    makes while the serializer keeps its class.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, timed when the request is."""
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = getattr(self.request, 'server_timing', None)
+        if timing is not None:
+            serializer.to_representation = timing.timed(
+                serializer.to_representation,
+            )
+
+        return serializer
@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for the production server.
+"""
+import multiprocessing
+import os
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 9000)}"
+
+# `GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker` serves `app.asgi`.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(
+    os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1
+)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+
+# Import the project once in the master so workers fork with it loaded.
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = '-'
+
+
+# Every worker writes its metrics to `METRICS_DIR` until it exits, then the
+# master merges its file into the archive so that the counters it recorded
+# outlive it.
+def post_fork(server, worker):
+    from core.metrics import registry
+    registry.start_flushing()
+
+
+def worker_exit(server, worker):
+    from core.metrics import registry
+    registry.flush()
+
+
+def child_exit(server, worker):
+    from core.metrics import registry
+    registry.archive(worker.pid)
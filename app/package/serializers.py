@@ -4,9 +4,10 @@ Serializers for package APIs
 from rest_framework import serializers
 
 from core.models import Package
+from core.serializers import DynamicFieldsMixin
 
 
-class PackageSerializer(serializers.ModelSerializer):
+class PackageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for packages."""
 
     class Meta:
@@ -30,3 +31,11 @@ class PackageImageSerializer(serializers.ModelSerializer):
         fields = ['code', 'image']
         read_only_fields = ['code']
         extra_kwargs = {'image': {'required': 'True'}}
+
+
+class PackageBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for deleting many packages."""
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False,
+    )
@@ -1,6 +1,7 @@
 """
 Tests for the packages API.
 """
+import json
 import tempfile
 import os
 
@@ -8,18 +9,20 @@ from PIL import Image
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Package, Robot
+from core.models import Package, QueuedFileDeletion, Robot
 
 from package.serializers import PackageSerializer
 
 
 PACKAGES_URL = reverse('package:package-list')
+EXPORT_URL = reverse('package:package-export')
+BULK_DELETE_URL = reverse('package:package-bulk-delete')
 
 
 def create_package(user, code, name='Testing', weight='200'):
@@ -103,4 +106,114 @@ class PrivatePackagesApiTests(TestCase):
         self.assertEqual(res.data[0]['code'], package.code)
         self.assertEqual(res.data[0]['name'], package.name)
 
-    
\ No newline at end of file
+    def test_export_packages(self):
+        """Test exporting the packages of the user as NDJSON."""
+        user2 = create_user(email='user2@example.com')
+        create_package(user=user2, code='TESTING1')
+        package = create_package(user=self.user, code='TESTING2')
+        robot = create_robot(user=self.user, serial_number='Test1')
+        robot.packages.add(package)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(rows, [{
+            'code': 'TESTING2',
+            'name': 'Testing',
+            'weight': 200,
+            'image': None,
+            'robot': 'Test1',
+        }])
+
+    def test_list_sparse_fields(self):
+        """Test listing only the requested package fields."""
+        create_package(user=self.user, code='TESTING1')
+
+        res = self.client.get(PACKAGES_URL, {'fields': 'code,weight'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'code': 'TESTING1', 'weight': 200}])
+
+    def test_delete_package(self):
+        """Test deleting a package that is not loaded."""
+        package = create_package(user=self.user, code='TESTING1')
+
+        res = self.client.delete(detail_url(package.code))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Package.objects.filter(code='TESTING1').exists())
+
+    def test_delete_loaded_package_error(self):
+        """Test a package loaded into a robot cannot be deleted."""
+        package = create_package(user=self.user, code='TESTING1')
+        robot = create_robot(user=self.user, serial_number='Test1')
+        robot.packages.add(package)
+
+        with self.assertNumQueries(2):
+            res = self.client.delete(detail_url(package.code))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Package.objects.filter(code='TESTING1').exists())
+
+    def test_bulk_delete(self):
+        """Test deleting many packages in one request."""
+        for i in range(5):
+            create_package(user=self.user, code=f'TESTING{i}')
+        Package.objects.filter(code='TESTING0').update(
+            image='uploads/package/test.jpg',
+        )
+        other_package = create_package(
+            user=create_user(email='test2@example.com'),
+            code='TESTING9',
+        )
+
+        res = self.client.post(BULK_DELETE_URL, {
+            'codes': [f'TESTING{i}' for i in range(4)] + ['TESTING9'],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'deleted': 4, 'not_found': ['TESTING9']})
+        self.assertEqual(
+            list(Package.objects.values_list('code', flat=True)
+                 .order_by('code')),
+            ['TESTING4', other_package.code],
+        )
+        self.assertEqual(
+            list(QueuedFileDeletion.objects.values_list('name', flat=True)),
+            ['uploads/package/test.jpg'],
+        )
+
+    @override_settings(BULK_DELETE_CHUNK_SIZE=2)
+    def test_bulk_delete_queries_per_chunk(self):
+        """Test deleting issues one statement per chunk."""
+        for i in range(6):
+            create_package(user=self.user, code=f'TESTING{i}')
+
+        with self.assertNumQueries(7):
+            res = self.client.post(BULK_DELETE_URL, {
+                'codes': [f'TESTING{i}' for i in range(6)],
+            }, format='json')
+
+        self.assertEqual(res.data, {'deleted': 6, 'not_found': []})
+        self.assertFalse(Package.objects.exists())
+
+    def test_bulk_delete_loaded_package_error(self):
+        """Test nothing is deleted if a package is loaded."""
+        create_package(user=self.user, code='TESTING1')
+        package = create_package(user=self.user, code='TESTING2')
+        create_robot(user=self.user, serial_number='Test1').packages.add(
+            package,
+        )
+
+        res = self.client.post(BULK_DELETE_URL, {
+            'codes': ['TESTING1', 'TESTING2'],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('TESTING2', str(res.data['codes']))
+        self.assertEqual(Package.objects.count(), 2)
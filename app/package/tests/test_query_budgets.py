@@ -0,0 +1,119 @@
+"""
+Tests for the query budgets of the packages API.
+"""
+import io
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Package, Robot
+from core.testing import QueryBudgetTestMixin
+from package.views import PackageViewSet
+
+
+PACKAGES_URL = reverse('package:package-list')
+
+
+def detail_url(package_code):
+    """Create and return a package detail URL."""
+    return reverse('package:package-detail', args=[package_code])
+
+
+class PackageQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the packages API makes as many queries for few or many."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.packages = 0
+        self.add_packages(4)
+
+    def add_packages(self, count):
+        """Add `count` packages, every other one loaded on a robot."""
+        robot = Robot.objects.create(
+            user=self.user,
+            serial_number=f'Test{self.packages}',
+        )
+        for i in range(self.packages, self.packages + count):
+            package = Package.objects.create(
+                user=self.user,
+                code=f'TEST{i}',
+                name='Testing',
+                weight=10,
+            )
+            if i % 2:
+                robot.packages.add(package)
+        self.packages += count
+
+    def grow(self):
+        """Add many more packages."""
+        self.add_packages(40)
+
+    def assertPackageBudget(self, action, request):
+        """Assert the budget of `action` of the packages API."""
+        return self.assertQueryBudget(
+            PackageViewSet,
+            action,
+            request,
+            self.grow,
+        )
+
+    def test_list(self):
+        """Test listing packages."""
+        self.assertPackageBudget('list', lambda i: self.client.get(
+            PACKAGES_URL,
+        ))
+
+    def test_create(self):
+        """Test creating a package."""
+        self.assertPackageBudget('create', lambda i: self.client.post(
+            PACKAGES_URL,
+            {'code': f'NEW{i}1', 'name': 'Testing', 'weight': 10},
+            format='json',
+        ))
+
+    def test_retrieve(self):
+        """Test retrieving a package."""
+        self.assertPackageBudget('retrieve', lambda i: self.client.get(
+            detail_url('TEST0'),
+        ))
+
+    def test_destroy(self):
+        """Test deleting a package that is not loaded."""
+        self.assertPackageBudget('destroy', lambda i: self.client.delete(
+            detail_url(f'TEST{i * 2}'),
+        ))
+
+    def test_export(self):
+        """Test exporting every package."""
+        self.assertPackageBudget('export', lambda i: self.client.get(
+            reverse('package:package-export'),
+        ))
+
+    def test_upload_image(self):
+        """Test uploading the image of a package."""
+        def upload(i):
+            image = io.BytesIO()
+            Image.new('RGB', (10, 10)).save(image, format='JPEG')
+            image.name = 'test.jpg'
+            image.seek(0)
+            return self.client.post(
+                reverse('package:package-upload-image', args=['TEST0']),
+                {'image': image},
+                format='multipart',
+            )
+
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            self.assertPackageBudget('upload_image', upload)
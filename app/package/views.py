@@ -1,18 +1,32 @@
 """
 Views for the packages API.
 """
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework import viewsets, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from core.models import Package, Robot
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+
+from core.models import Package, QueuedFileDeletion, RobotPackage
+from core.renderers import NDJSONRenderer, iter_ndjson
+from core.views import ProfilingMixin, ServerTimingMixin, \
+    SparseFieldsetsMixin
 from package import serializers
 
 
-class PackageViewSet(viewsets.ModelViewSet):
+class PackageViewSet(
+    ServerTimingMixin,
+    ProfilingMixin,
+    SparseFieldsetsMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage packages APIs."""
     serializer_class = serializers.PackageSerializer
     queryset = Package.objects.all()
@@ -20,10 +34,33 @@ class PackageViewSet(viewsets.ModelViewSet):
     lookup_field = 'code'
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    filter_lookups = {
+        'weight': ['exact', 'gte', 'lte', 'range'],
+        'name': ['exact', 'startswith'],
+    }
+    # Most queries per request of each action, whatever the amount of data.
+    # Every budget starts with the token lookup of the authentication.
+    query_budgets = {
+        'list': 2,
+        # The unique check of the code, then the insert.
+        'create': 3,
+        'retrieve': 2,
+        # The package, the check that no robot holds it, then one delete of
+        # its links and one of the package.
+        'destroy': 5,
+        # bulk_delete is left out, it makes queries per chunk of codes.
+        # One server side cursor streams every row.
+        'export': 2,
+        # The package, then the update of its image.
+        'upload_image': 3,
+    }
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.queryset.filter(user=self.request.user).order_by(
+            '-name',
+            'code',
+        )
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -34,7 +71,10 @@ class PackageViewSet(viewsets.ModelViewSet):
 
     def perform_destroy(self, instance):
         """Destroy the package."""
-        if Robot.objects.filter(packages__code=instance.code).exists():
+        if RobotPackage.objects.filter(
+            user_id=instance.user_id,
+            package=instance,
+        ).exists():
             raise PermissionDenied(
                 detail='The package is currently inside of a robot.'
             )
@@ -45,6 +85,103 @@ class PackageViewSet(viewsets.ModelViewSet):
         """Create new package."""
         serializer.save(user=self.request.user)
 
+    @action(
+        detail=False,
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            NDJSONRenderer,
+        ],
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream every package of the user as NDJSON."""
+        rows = self.get_queryset().values(
+            'code',
+            'name',
+            'weight',
+            'image',
+            'robot__serial_number',
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+        def export_rows():
+            for row in rows:
+                row['robot'] = row.pop('robot__serial_number')
+                if row['image']:
+                    row['image'] = request.build_absolute_uri(
+                        default_storage.url(row['image'])
+                    )
+                else:
+                    row['image'] = None
+                yield row
+
+        return StreamingHttpResponse(
+            iter_ndjson(export_rows()),
+            content_type=NDJSONRenderer.media_type,
+        )
+
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='bulk-delete',
+        serializer_class=serializers.PackageBulkDeleteSerializer,
+    )
+    def bulk_delete(self, request, *args, **kwargs):
+        """
+        Delete many packages, none of them may be loaded. The codes that
+        match no package of the user are returned as `not_found`.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        codes = serializer.validated_data['codes']
+        chunk_size = settings.BULK_DELETE_CHUNK_SIZE
+
+        with transaction.atomic():
+            packages = {
+                package_id: (code, image)
+                for package_id, code, image in self.get_queryset().filter(
+                    code__in=codes,
+                ).order_by('id').select_for_update().values_list(
+                    'id',
+                    'code',
+                    'image',
+                )
+            }
+            loaded = list(RobotPackage.objects.filter(
+                user=request.user,
+                package_id__in=packages,
+            ).values_list('package__code', flat=True))
+            if loaded:
+                raise ValidationError({
+                    'codes': f'The packages {loaded} are loaded into robots.'
+                })
+
+            # Rows are deleted without signals, their images are removed by
+            # `manage.py delete_queued_files` in the maintenance service.
+            found = list(packages)
+            with connection.cursor() as cursor:
+                for start in range(0, len(found), chunk_size):
+                    # The user narrows the delete to one partition when the
+                    # table is partitioned by user.
+                    cursor.execute(
+                        f'DELETE FROM {Package._meta.db_table} '
+                        'WHERE user_id = %s AND id = ANY(%s)',
+                        [request.user.id, found[start:start + chunk_size]],
+                    )
+            QueuedFileDeletion.objects.bulk_create(
+                (QueuedFileDeletion(name=image)
+                 for _, image in packages.values() if image),
+                batch_size=chunk_size,
+            )
+
+        deleted = {code for code, _ in packages.values()}
+        not_found = list(dict.fromkeys(
+            code for code in codes if code not in deleted
+        ))
+
+        return Response(
+            {'deleted': len(found), 'not_found': not_found},
+            status=status.HTTP_200_OK,
+        )
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, *args, **kwargs):
         """Upload an image to package."""
@@ -1,9 +1,15 @@
 """
 Serializers for robot APIs
 """
+from collections import Counter
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
-from core.models import Robot, Package
+from core.capacity import capacity_index
+from core.exceptions import Conflict
+from core.models import Robot, RobotPackage, Package
+from core.serializers import DynamicFieldsMixin
 from rest_framework.exceptions import ParseError
 
 from package.serializers import PackageSerializer
@@ -36,10 +42,15 @@ class ChoicesField(serializers.ChoiceField):
         )
 
 
-class RobotSerializer(serializers.ModelSerializer):
+class RobotSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Robots."""
     robot_model = ChoicesField(Robot.ROBOT_MODEL)
     state = serializers.CharField(source='get_state_display', read_only=True)
+    packages = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field='code',
+    )
 
     class Meta:
         model = Robot
@@ -99,8 +110,35 @@ class RobotBatterySerializer(serializers.ModelSerializer):
             ]
 
 
+class AvailableRobotsQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of check_available."""
+    min_capacity = serializers.IntegerField(required=False, min_value=0)
+    min_battery = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=100,
+    )
+
+
+class RobotFitsQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of fits."""
+    weight = serializers.IntegerField(min_value=1, max_value=500)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class PackageCodesField(serializers.ListField):
+    """Codes of packages, read from the packages of a robot."""
+    child = serializers.CharField(max_length=50)
+
+    def to_representation(self, value):
+        """Return the codes of the related packages."""
+        return [package.code for package in value.all()]
+
+
 class RobotAddSerializer(serializers.ModelSerializer):
     """Serializer for add package to robot."""
+    packages = PackageCodesField()
+
     class Meta:
         model = Robot
         lookup_field = 'serial_number'
@@ -114,60 +152,223 @@ class RobotAddSerializer(serializers.ModelSerializer):
             'serial_number',
             ]
 
+    def validate_packages(self, codes):
+        """Resolve the codes to packages of the authenticated user."""
+        if len(set(codes)) != len(codes):
+            raise serializers.ValidationError(
+                'You cannot load the same package twice into a robot.'
+            )
+
+        packages = Package.objects.filter(
+            user=self.context['request'].user,
+        ).only('code', 'weight').in_bulk(codes, field_name='code')
+        missing = [code for code in codes if code not in packages]
+        if missing:
+            raise serializers.ValidationError(
+                f'The packages {missing} do not exist.'
+            )
+
+        return [packages[code] for code in codes]
+
     def update(self, instance, validated_data):
         """Add package to robot."""
-        if instance.state == Robot.ROBOT_STATUS.idl or \
-                instance.state == Robot.ROBOT_STATUS.ldg:
-
-            packages = validated_data.pop('packages', None)
-
-            if len(set(packages)) != len(packages):
-                raise ParseError(detail='You cannot load the same '
-                                        'package twice into a robot.')
-
-            if packages is not None and len(packages) > 0:
-                insert_packages = []
-                auth_user = self.context['request'].user
-                user_meds = Package.objects.filter(user=auth_user)
-                robot_remaining_space = instance.weight_limit
-
-                for item in packages:
-                    if instance.packages.filter(code=item).exists():
-                        raise ParseError(detail=f'The package {item} '
-                                                'is already loaded into this'
-                                                ' robot. You cannot load the'
-                                                ' same package twice into'
-                                                ' a robot.')
-
-                for item in packages:
-                    try:
-                        new_package = Package.objects.get(
-                                user=auth_user,
-                                code=item
-                                )
-                        robot_remaining_space -= new_package.weight
-                        if robot_remaining_space < 0:
-                            raise ParseError(detail='The robot cannot load '
-                                                    'the total weight of the'
-                                                    ' selected packages.')
-
-                        insert_packages.append(new_package)
-                    except Package.DoesNotExist:
-                        if len(user_meds):
-                            detail = 'The available packages are '\
-                                    f'{[m.code for m in user_meds]}.'
-                            raise ParseError(detail=detail)
-                        else:
-                            raise ParseError(detail='You have to '
-                                                    'create a package '
-                                                    'first.')
-
-                for pckg_get in insert_packages:
-                    instance.packages.add(pckg_get)
-                    instance.weight_limit -= pckg_get.weight
-        else:
-            raise ParseError(detail='The robot can only be loaded on '
-                                    'Idle and Loading states.')
-
-        instance.save()
+        packages = validated_data['packages']
+
+        try:
+            with transaction.atomic():
+                robot = Robot.objects.select_for_update().only(
+                    'user',
+                    'state',
+                    'weight_limit',
+                ).get(pk=instance.pk)
+
+                if robot.state not in (
+                    Robot.ROBOT_STATUS.idl,
+                    Robot.ROBOT_STATUS.ldg,
+                ):
+                    raise ParseError(detail='The robot can only be loaded '
+                                            'on Idle and Loading states.')
+
+                loaded = RobotPackage.objects.filter(
+                    user_id=robot.user_id,
+                    package__in=packages,
+                ).values_list(
+                    'package__code',
+                    'robot__serial_number',
+                ).first()
+                if loaded and loaded[1] == instance.serial_number:
+                    raise ParseError(detail=f'The package {loaded[0]} '
+                                            'is already loaded into this'
+                                            ' robot. You cannot load the'
+                                            ' same package twice into'
+                                            ' a robot.')
+                if loaded:
+                    raise ParseError(detail=f'The package {loaded[0]} '
+                                            'is already loaded into the'
+                                            f' robot {loaded[1]}.')
+
+                total_weight = sum(package.weight for package in packages)
+                if total_weight > robot.weight_limit:
+                    raise ParseError(detail='The robot cannot load '
+                                            'the total weight of the'
+                                            ' selected packages.')
+
+                if packages:
+                    # Packages are known not to be loaded, so the check for
+                    # existing rows of `packages.add()` is not needed.
+                    RobotPackage.objects.bulk_create(
+                        RobotPackage(
+                            user_id=robot.user_id,
+                            robot=robot,
+                            package=package,
+                        )
+                        for package in packages
+                    )
+                    robot.weight_limit -= total_weight
+                    robot.save(update_fields=['weight_limit'])
+        except IntegrityError:
+            # The unique package column caught a concurrent load.
+            raise Conflict(detail='A package was loaded into another '
+                                  'robot at the same time.')
+
+        instance.state = robot.state
+        instance.weight_limit = robot.weight_limit
         return instance
+
+
+class RobotBatchLoadSerializer(serializers.Serializer):
+    """Serializer for loading packages into many robots at once."""
+
+    def to_internal_value(self, data):
+        """Validate a mapping of serial numbers to package codes."""
+        try:
+            loads = serializers.DictField(
+                child=PackageCodesField(),
+                allow_empty=False,
+            ).run_validation(data)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError(
+                serializers.as_serializer_error(exc)
+            )
+
+        user = self.context['request'].user
+        codes = [code for codes in loads.values() for code in codes]
+        robots = set(Robot.objects.filter(
+            user=user,
+            serial_number__in=loads.keys(),
+        ).values_list('serial_number', flat=True))
+        packages = Package.objects.filter(user=user).only(
+            'code',
+            'weight',
+        ).in_bulk(codes, field_name='code')
+        seen = Counter(
+            code
+            for robot_codes in loads.values()
+            for code in set(robot_codes)
+        )
+
+        errors = {}
+        for serial_number, robot_codes in loads.items():
+            if serial_number not in robots:
+                errors[serial_number] = ['Not found.']
+                continue
+            robot_errors = []
+            if len(set(robot_codes)) != len(robot_codes):
+                robot_errors.append(
+                    'You cannot load the same package twice into a robot.'
+                )
+            missing = [code for code in robot_codes if code not in packages]
+            if missing:
+                robot_errors.append(f'The packages {missing} do not exist.')
+            shared = [code for code in robot_codes if seen[code] > 1]
+            if shared:
+                robot_errors.append(
+                    f'The packages {shared} are loaded into more than one '
+                    'robot.'
+                )
+            if robot_errors:
+                errors[serial_number] = robot_errors
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return {
+            serial_number: [packages[code] for code in robot_codes]
+            for serial_number, robot_codes in loads.items()
+        }
+
+    def check_robot(self, robot, packages, loaded):
+        """Return the errors of loading `packages` into the locked robot."""
+        if robot.state not in (Robot.ROBOT_STATUS.idl, Robot.ROBOT_STATUS.ldg):
+            return ['The robot can only be loaded on Idle and Loading states.']
+
+        already_loaded = [
+            package.code for package in packages if package.pk in loaded
+        ]
+        if already_loaded:
+            return [
+                f'The packages {already_loaded} are already loaded into a '
+                'robot.'
+            ]
+
+        if sum(package.weight for package in packages) > robot.weight_limit:
+            return [
+                'The robot cannot load the total weight of the selected '
+                'packages.'
+            ]
+
+        return []
+
+    def create(self, validated_data):
+        """Load every robot or none of them."""
+        user = self.context['request'].user
+        try:
+            with transaction.atomic():
+                robots = list(Robot.objects.select_for_update().filter(
+                    user=user,
+                    serial_number__in=validated_data.keys(),
+                ).only(
+                    'serial_number',
+                    'state',
+                    'weight_limit',
+                ).order_by('serial_number'))
+                loaded = set(RobotPackage.objects.filter(
+                    user=user,
+                    package__in=[
+                        package
+                        for packages in validated_data.values()
+                        for package in packages
+                    ],
+                ).values_list('package_id', flat=True))
+
+                errors = {}
+                for robot in robots:
+                    packages = validated_data[robot.serial_number]
+                    robot_errors = self.check_robot(robot, packages, loaded)
+                    if robot_errors:
+                        errors[robot.serial_number] = robot_errors
+                    robot.weight_limit -= sum(
+                        package.weight for package in packages
+                    )
+
+                if errors:
+                    raise serializers.ValidationError(errors)
+
+                RobotPackage.objects.bulk_create(
+                    RobotPackage(user=user, robot=robot, package=package)
+                    for robot in robots
+                    for package in validated_data[robot.serial_number]
+                )
+                Robot.objects.bulk_update(robots, ['weight_limit'])
+        except IntegrityError:
+            # The unique package column caught a concurrent load.
+            raise Conflict(detail='A package was loaded into another '
+                                  'robot at the same time.')
+
+        # bulk_update() sends no post_save for the capacity index.
+        capacity_index.invalidate(user.id)
+
+        return Robot.objects.filter(
+            user=user,
+            serial_number__in=validated_data.keys(),
+        ).order_by('serial_number').prefetch_related('packages')
@@ -0,0 +1,161 @@
+"""
+Tests for the query budgets of the robot API.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Package, Robot
+from core.testing import QueryBudgetTestMixin
+from robot.views import RobotViewSet
+
+
+ROBOTS_URL = reverse('robot:robot-list')
+
+
+def detail_url(action, robot_sn):
+    """Create and return the URL of a detail action of a robot."""
+    return reverse(f'robot:robot-{action}', args=[robot_sn])
+
+
+class RobotQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the robot API makes as many queries for few or many robots."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.robots = 0
+        self.add_robots(2)
+        for i in range(2):
+            Robot.objects.create(user=self.user, serial_number=f'Idle{i}')
+            for suffix in 'AB':
+                Package.objects.create(
+                    user=self.user,
+                    code=f'FREE{i}{suffix}',
+                    name='Testing',
+                    weight=10,
+                )
+
+    def add_robots(self, count):
+        """Add `count` robots, each loaded with two packages."""
+        for i in range(self.robots, self.robots + count):
+            robot = Robot.objects.create(
+                user=self.user,
+                serial_number=f'Test{i}',
+            )
+            robot.packages.add(*(
+                Package.objects.create(
+                    user=self.user,
+                    code=f'TEST{i}{suffix}',
+                    name='Testing',
+                    weight=10,
+                )
+                for suffix in 'AB'
+            ))
+        self.robots += count
+
+    def grow(self):
+        """Add many more robots."""
+        self.add_robots(20)
+
+    def assertRobotBudget(self, action, request):
+        """Assert the budget of `action` of the robot API."""
+        return self.assertQueryBudget(RobotViewSet, action, request, self.grow)
+
+    def test_list(self):
+        """Test listing robots."""
+        self.assertRobotBudget('list', lambda i: self.client.get(ROBOTS_URL))
+
+    def test_create(self):
+        """Test creating a robot."""
+        self.assertRobotBudget('create', lambda i: self.client.post(
+            ROBOTS_URL,
+            {'serial_number': f'NewRobot{i}', 'robot_model': 1},
+            format='json',
+        ))
+
+    def test_retrieve(self):
+        """Test retrieving a robot."""
+        self.assertRobotBudget('retrieve', lambda i: self.client.get(
+            detail_url('detail', 'Test0'),
+        ))
+
+    def test_destroy(self):
+        """Test deleting a loaded robot."""
+        self.assertRobotBudget('destroy', lambda i: self.client.delete(
+            detail_url('detail', f'Test{i}'),
+        ))
+
+    def test_check_available(self):
+        """Test listing the available robots."""
+        self.assertRobotBudget('check_available', lambda i: self.client.get(
+            reverse('robot:robot-check-available'),
+        ))
+
+    def test_fits(self):
+        """Test listing the robots that fit a package."""
+        self.assertRobotBudget('fits', lambda i: self.client.get(
+            reverse('robot:robot-fits'),
+            {'weight': 10},
+        ))
+
+    def test_export(self):
+        """Test exporting every robot."""
+        self.assertRobotBudget('export', lambda i: self.client.get(
+            reverse('robot:robot-export'),
+        ))
+
+    def test_load_package(self):
+        """Test loading two packages into a robot."""
+        self.assertRobotBudget('load_package', lambda i: self.client.post(
+            detail_url('load-package', f'Idle{i}'),
+            {'packages': [f'FREE{i}A', f'FREE{i}B']},
+            format='json',
+        ))
+
+    def test_load_package_idempotent(self):
+        """Test loading packages with an idempotency key."""
+        self.assertRobotBudget('load_package', lambda i: self.client.post(
+            detail_url('load-package', f'Idle{i}'),
+            {'packages': [f'FREE{i}A', f'FREE{i}B']},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=f'key-{i}',
+        ))
+
+    def test_load(self):
+        """Test loading packages into a robot in a batch."""
+        self.assertRobotBudget('load', lambda i: self.client.post(
+            reverse('robot:robot-load'),
+            {f'Idle{i}': [f'FREE{i}A', f'FREE{i}B']},
+            format='json',
+        ))
+
+    def test_load_idempotent(self):
+        """Test loading a batch with an idempotency key."""
+        self.assertRobotBudget('load', lambda i: self.client.post(
+            reverse('robot:robot-load'),
+            {f'Idle{i}': [f'FREE{i}A', f'FREE{i}B']},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=f'key-{i}',
+        ))
+
+    def test_check_package(self):
+        """Test listing the packages of a robot."""
+        self.assertRobotBudget('check_package', lambda i: self.client.get(
+            detail_url('check-package', 'Test0'),
+        ))
+
+    def test_check_battery(self):
+        """Test checking the battery of a robot."""
+        self.assertRobotBudget('check_battery', lambda i: self.client.get(
+            detail_url('check-battery', 'Test0'),
+        ))
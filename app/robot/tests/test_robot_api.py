@@ -1,8 +1,13 @@
 """
 Tests for robot APIs.
 """
+import json
+import tracemalloc
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -17,6 +22,10 @@ from robot.serializers import (
 
 
 ROBOTS_URL = reverse('robot:robot-list')
+EXPORT_URL = reverse('robot:robot-export')
+AVAILABLE_URL = reverse('robot:robot-check-available')
+FITS_URL = reverse('robot:robot-fits')
+LOAD_URL = reverse('robot:robot-load')
 
 
 def detail_url(robot_sn):
@@ -29,6 +38,16 @@ def add_package_url(robot_sn):
     return reverse('robot:robot-load-package', args=[robot_sn])
 
 
+def check_package_url(robot_sn):
+    """Create and return a robot check-package URL."""
+    return reverse('robot:robot-check-package', args=[robot_sn])
+
+
+def check_battery_url(robot_sn):
+    """Create and return a robot check-battery URL."""
+    return reverse('robot:robot-check-battery', args=[robot_sn])
+
+
 def create_robot(user, serial_number, **params):
     """Create and return a sample robot."""
     robot = Robot.objects.create(
@@ -255,4 +274,404 @@ class PrivateRobotAPITests(TestCase):
         res = self.client.post(url, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertNotIn(package, robot.packages.all())
\ No newline at end of file
+        self.assertNotIn(package, robot.packages.all())
+
+    def test_export_robots(self):
+        """Test exporting the robots of the user as NDJSON."""
+        other_user = create_user(
+            email='test2@example.com',
+            password='12345678'
+        )
+        create_robot(user=other_user, serial_number='Test1')
+        create_robot(
+            user=self.user,
+            serial_number='Test2',
+            robot_model=Robot.ROBOT_MODEL.hw,
+            state=Robot.ROBOT_STATUS.ldg,
+        )
+
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(rows, [{
+            'serial_number': 'Test2',
+            'robot_model': 'Heavyweight',
+            'weight_limit': 500,
+            'battery': 100,
+            'state': 'Loading',
+        }])
+
+    @override_settings(EXPORT_CHUNK_SIZE=100)
+    def test_export_memory_independent_of_rows(self):
+        """Test the peak memory of an export does not grow with rows."""
+        def export_peak(rows):
+            Robot.objects.filter(user=self.user).delete()
+            Robot.objects.bulk_create(
+                Robot(
+                    user=self.user,
+                    serial_number=f'TEST{i:06}',
+                    weight_limit=100,
+                )
+                for i in range(rows)
+            )
+            res = self.client.get(EXPORT_URL)
+
+            tracemalloc.start()
+            lines = sum(
+                chunk.count(b'\n') for chunk in res.streaming_content
+            )
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            self.assertEqual(lines, rows)
+            return peak
+
+        small_peak = export_peak(1000)
+        large_peak = export_peak(10000)
+
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_list_sparse_fields(self):
+        """Test listing only the requested fields."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        robot.packages.add(create_package(user=self.user, code='TEST1'))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                ROBOTS_URL,
+                {'fields': 'serial_number,battery'},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [{'serial_number': 'Test1', 'battery': 100}],
+        )
+
+    def test_list_prefetches_packages(self):
+        """Test listing robots with packages does not query per robot."""
+        for i in range(3):
+            robot = create_robot(user=self.user, serial_number=f'Test{i}')
+            robot.packages.add(
+                create_package(user=self.user, code=f'TEST{i}', weight=10)
+            )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(ROBOTS_URL)
+
+        self.assertEqual(res.data[0]['packages'], ['TEST0'])
+
+    def test_detail_exclude_fields(self):
+        """Test excluding fields from the robot detail."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(robot.serial_number),
+                {'exclude': 'packages,weight_limit,robot_model'},
+            )
+
+        self.assertEqual(res.data, {
+            'serial_number': 'Test1',
+            'battery': 100,
+            'state': 'Idle',
+        })
+
+    def test_sparse_fields_unknown(self):
+        """Test requesting an unknown field returns an error."""
+        res = self.client.get(ROBOTS_URL, {'fields': 'serial_number,color'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_available_limited_to_user(self):
+        """Test available robots are limited to authenticated user."""
+        other_user = create_user(
+            email='test2@example.com',
+            password='12345678'
+        )
+        create_robot(user=other_user, serial_number='Test1')
+        create_robot(user=self.user, serial_number='Test2')
+        create_robot(user=self.user, serial_number='Test3', state=1)
+        create_robot(user=self.user, serial_number='Test4', state=2)
+
+        res = self.client.get(AVAILABLE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test2', 'Test3'],
+        )
+
+    def test_check_available_min_capacity_and_battery(self):
+        """Test filtering available robots on capacity and battery."""
+        create_robot(user=self.user, serial_number='Test1', robot_model=3)
+        create_robot(
+            user=self.user, serial_number='Test2', robot_model=3, battery=20,
+        )
+        create_robot(user=self.user, serial_number='Test3', robot_model=0)
+
+        res = self.client.get(
+            AVAILABLE_URL,
+            {'min_capacity': 300, 'min_battery': 50},
+        )
+
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test1'],
+        )
+
+    def test_check_available_sparse_fields(self):
+        """Test available robots select only the requested columns."""
+        create_robot(user=self.user, serial_number='Test1')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(AVAILABLE_URL, {'fields': 'serial_number'})
+
+        self.assertEqual(res.data, [{'serial_number': 'Test1'}])
+        self.assertEqual(len(queries), 1)
+        self.assertRegex(
+            queries[0]['sql'],
+            r'^SELECT "core_robot"\."id", "core_robot"\."serial_number" FROM',
+        )
+
+    def test_check_available_invalid_params(self):
+        """Test invalid capacity or battery returns an error."""
+        res = self.client.get(
+            AVAILABLE_URL,
+            {'min_capacity': 'heavy', 'min_battery': 101},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_capacity', res.data)
+        self.assertIn('min_battery', res.data)
+
+    def test_fits_best_fit_first(self):
+        """Test robots that fit a package are ordered by spare capacity."""
+        create_robot(user=self.user, serial_number='Test1', robot_model=3)
+        create_robot(user=self.user, serial_number='Test2', robot_model=1)
+        create_robot(user=self.user, serial_number='Test3', robot_model=0)
+        create_robot(user=self.user, serial_number='Test4', robot_model=2)
+        create_robot(
+            user=self.user, serial_number='Test5', robot_model=1, state=3,
+        )
+        create_robot(
+            user=create_user(email='test2@example.com', password='12345678'),
+            serial_number='Test6',
+            robot_model=1,
+        )
+
+        res = self.client.get(FITS_URL, {'weight': 200, 'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test2', 'Test4'],
+        )
+
+    def test_fits_weight_required(self):
+        """Test the package weight is required."""
+        res = self.client.get(FITS_URL, {'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('weight', res.data)
+
+    @override_settings(ROBOT_CAPACITY_INDEX=True)
+    def test_fits_capacity_index(self):
+        """Test the capacity index answers and follows robot changes."""
+        create_robot(user=self.user, serial_number='Test1', robot_model=3)
+        robot = create_robot(
+            user=self.user, serial_number='Test2', robot_model=1,
+        )
+
+        res = self.client.get(FITS_URL, {'weight': 200})
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test2', 'Test1'],
+        )
+        self.assertEqual(
+            res.data[0],
+            self.client.get(FITS_URL, {'weight': 200}).data[0],
+        )
+        with self.assertNumQueries(0):
+            self.client.get(FITS_URL, {'weight': 200, 'limit': 1})
+
+        robot.state = Robot.ROBOT_STATUS.dlg
+        robot.save()
+        res = self.client.get(FITS_URL, {'weight': 200})
+
+        self.assertEqual(
+            [robot['serial_number'] for robot in res.data],
+            ['Test1'],
+        )
+
+    def test_add_package_other_user(self):
+        """Test a package of another user cannot be loaded."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        other_user = create_user(
+            email='test2@example.com',
+            password='12345678'
+        )
+        create_package(user=other_user, code='TEST1')
+
+        res = self.client.post(
+            add_package_url(robot.serial_number),
+            {'packages': ['TEST1']},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('packages', res.data)
+        self.assertFalse(robot.packages.exists())
+
+    def test_add_package_missing_packages(self):
+        """Test loading without a packages list returns an error."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+
+        res = self.client.post(add_package_url(robot.serial_number), {})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_add_package_already_loaded(self):
+        """Test loading a package already in the robot returns an error."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        robot.packages.add(create_package(user=self.user, code='TEST1'))
+
+        res = self.client.post(
+            add_package_url(robot.serial_number),
+            {'packages': ['TEST1']},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already loaded', res.data['detail'])
+
+    def test_add_package_updates_weight_limit(self):
+        """Test loading packages lowers the remaining capacity."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        create_package(user=self.user, code='TEST1', weight=30)
+        create_package(user=self.user, code='TEST2', weight=20)
+
+        res = self.client.post(
+            add_package_url(robot.serial_number),
+            {'packages': ['TEST1', 'TEST2']},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['weight_limit'], 50)
+        self.assertEqual(sorted(res.data['packages']), ['TEST1', 'TEST2'])
+        robot.refresh_from_db()
+        self.assertEqual(robot.weight_limit, 50)
+
+    def test_check_package(self):
+        """Test reading the packages of a robot in two queries."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        robot.packages.add(create_package(user=self.user, code='TEST1'))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(check_package_url(robot.serial_number))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['packages'][0]['code'], 'TEST1')
+
+    def test_check_battery(self):
+        """Test reading the battery of a robot in one query."""
+        robot = create_robot(user=self.user, serial_number='Test1', battery=42)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(check_battery_url(robot.serial_number))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'battery': 42})
+
+    def test_batch_load(self):
+        """Test loading many robots in one request."""
+        for i in range(3):
+            create_robot(user=self.user, serial_number=f'Test{i}')
+            create_package(user=self.user, code=f'TEST{i}A', weight=10)
+            create_package(user=self.user, code=f'TEST{i}B', weight=20)
+        payload = {
+            f'Test{i}': [f'TEST{i}A', f'TEST{i}B']
+            for i in range(3)
+        }
+
+        with self.assertNumQueries(10):
+            res = self.client.post(LOAD_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(res.data[0]['weight_limit'], 70)
+        self.assertEqual(sorted(res.data[0]['packages']), ['TEST0A', 'TEST0B'])
+        robot = Robot.objects.get(serial_number='Test2')
+        self.assertEqual(robot.weight_limit, 70)
+        self.assertEqual(robot.packages.count(), 2)
+
+    def test_batch_load_errors_per_robot(self):
+        """Test a batch with errors loads nothing and reports each robot."""
+        create_robot(user=self.user, serial_number='Test1')
+        create_robot(user=self.user, serial_number='Test2')
+        create_robot(
+            user=create_user(email='test2@example.com', password='12345678'),
+            serial_number='Test3',
+        )
+        create_package(user=self.user, code='TEST1')
+        create_package(user=self.user, code='TEST2')
+
+        res = self.client.post(LOAD_URL, {
+            'Test1': ['TEST1', 'TEST2'],
+            'Test2': ['TEST2', 'NOPE1'],
+            'Test3': ['TEST1'],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['Test1']), 1)
+        self.assertEqual(len(res.data['Test2']), 2)
+        self.assertEqual(res.data['Test3'], ['Not found.'])
+        self.assertFalse(Robot.packages.through.objects.exists())
+
+    def test_batch_load_overweight_rolls_back(self):
+        """Test one robot over its limit keeps every robot unloaded."""
+        create_robot(user=self.user, serial_number='Test1')
+        create_robot(user=self.user, serial_number='Test2')
+        create_package(user=self.user, code='TEST1', weight=50)
+        create_package(user=self.user, code='TEST2', weight=400)
+
+        res = self.client.post(LOAD_URL, {
+            'Test1': ['TEST1'],
+            'Test2': ['TEST2'],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), ['Test2'])
+        self.assertFalse(Robot.packages.through.objects.exists())
+        self.assertEqual(
+            Robot.objects.get(serial_number='Test1').weight_limit,
+            100,
+        )
+
+    def test_batch_load_invalid_payload(self):
+        """Test a payload that is not a mapping returns an error."""
+        res = self.client.post(LOAD_URL, ['TEST1'], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_add_package_loaded_into_other_robot(self):
+        """Test a package already on another robot cannot be loaded."""
+        robot = create_robot(user=self.user, serial_number='Test1')
+        other_robot = create_robot(user=self.user, serial_number='Test2')
+        other_robot.packages.add(create_package(user=self.user, code='TEST1'))
+
+        res = self.client.post(
+            add_package_url(robot.serial_number),
+            {'packages': ['TEST1']},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Test2', res.data['detail'])
+        self.assertFalse(robot.packages.exists())
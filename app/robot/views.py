@@ -6,13 +6,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 
-from django.db.models import Q
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from core.capacity import AVAILABLE_STATES, capacity_index
+from core.idempotency import idempotent
 from core.models import Robot
+from core.renderers import NDJSONRenderer, iter_ndjson
+from core.views import ProfilingMixin, ServerTimingMixin, \
+    SparseFieldsetsMixin
 from robot import serializers
 
 
-class RobotViewSet(viewsets.ModelViewSet):
+class RobotViewSet(
+    ServerTimingMixin,
+    ProfilingMixin,
+    SparseFieldsetsMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage robot APIs."""
 
     serializer_class = serializers.RobotDetailSerializer
@@ -21,12 +33,56 @@ class RobotViewSet(viewsets.ModelViewSet):
     lookup_field = 'serial_number'
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    sparse_fieldsets_actions = ['list', 'retrieve', 'check_available']
+    filter_lookups = {
+        'state': ['exact', 'in'],
+        'robot_model': ['exact', 'in'],
+        'battery': ['exact', 'gte', 'lte'],
+        'weight_limit': ['gte', 'lte'],
+    }
+    # Most queries per request of each action, whatever the amount of data.
+    # Every budget starts with the token lookup of the authentication.
+    query_budgets = {
+        # The robots, then the packages of all of them in one prefetch.
+        'list': 3,
+        # The unique check of the serial number, the insert, then the
+        # packages of the response.
+        'create': 4,
+        'retrieve': 3,
+        # The robot, then one delete of its links and one of the robot.
+        'destroy': 4,
+        'check_available': 3,
+        'fits': 3,
+        # One server side cursor streams every row.
+        'export': 2,
+        # The robot and the packages, then in a savepoint: the locked robot,
+        # the packages loaded elsewhere, the insert of the links and the
+        # update of the weight limit. Then the packages of the response.
+        # That is 10 queries. An idempotency key adds its lookup and, in a
+        # savepoint, the purge of old keys and the insert of the response.
+        'load_package': 15,
+        # As load_package, with the robots checked by serial number first
+        # and the packages of the response prefetched: 11 queries, 16 with
+        # an idempotency key.
+        'load': 16,
+        # The robot, then its packages.
+        'check_package': 3,
+        'check_battery': 2,
+    }
 
     def get_queryset(self):
         """Retrieve robots for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by(
+        queryset = self.queryset.filter(user=self.request.user).order_by(
             'serial_number'
         )
+        if self.action == 'check_package':
+            queryset = queryset.only('serial_number').prefetch_related(
+                'packages',
+            )
+        elif self.action == 'check_battery':
+            queryset = queryset.only('serial_number', 'battery')
+
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -49,35 +105,135 @@ class RobotViewSet(viewsets.ModelViewSet):
     def check_available(self, *args, **kwargs):
         """List all available robot to load packages."""
 
-        available_robots = Robot.objects.filter(Q(state=0) | Q(state=1))
-        serializer = serializers.RobotSerializer(available_robots, many=True)
+        params = serializers.AvailableRobotsQuerySerializer(
+            data=self.request.query_params,
+        )
+        params.is_valid(raise_exception=True)
+
+        available_robots = self.get_queryset().filter(
+            state__in=AVAILABLE_STATES,
+        )
+        if 'min_capacity' in params.validated_data:
+            available_robots = available_robots.filter(
+                weight_limit__gte=params.validated_data['min_capacity'],
+            )
+        if 'min_battery' in params.validated_data:
+            available_robots = available_robots.filter(
+                battery__gte=params.validated_data['min_battery'],
+            )
+
+        available_robots = self.filter_queryset(available_robots)
+        serializer = self.get_serializer(available_robots, many=True)
+
+        return Response(serializer.data)
+
+    @action(detail=False, serializer_class=serializers.RobotSerializer)
+    def fits(self, request, *args, **kwargs):
+        """List the available robots that fit a package, best fit first."""
+        params = serializers.RobotFitsQuerySerializer(
+            data=request.query_params,
+        )
+        params.is_valid(raise_exception=True)
+        weight = params.validated_data['weight']
+        limit = params.validated_data['limit']
+
+        if settings.ROBOT_CAPACITY_INDEX:
+            return Response(capacity_index.fits(
+                request.user.id,
+                weight,
+                limit,
+                self.load_capacities,
+            ))
+
+        robots = self.project_queryset(
+            self.get_queryset().filter(
+                state__in=AVAILABLE_STATES,
+                weight_limit__gte=weight,
+            ).order_by('weight_limit', 'serial_number')
+        )[:limit]
+        serializer = self.get_serializer(robots, many=True)
 
         return Response(serializer.data)
 
+    def load_capacities(self, user_id):
+        """Return the available robots of the user for the capacity index."""
+        robots = self.project_queryset(
+            Robot.objects.filter(
+                user_id=user_id,
+                state__in=AVAILABLE_STATES,
+            ).order_by('weight_limit', 'serial_number')
+        )
+
+        return [
+            (robot['weight_limit'], robot)
+            for robot in self.get_serializer(robots, many=True).data
+        ]
+
+    @action(
+        detail=False,
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            NDJSONRenderer,
+        ],
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream every robot of the user as NDJSON."""
+        robot_models = {k: str(v) for k, v in Robot.ROBOT_MODEL}
+        states = {k: str(v) for k, v in Robot.ROBOT_STATUS}
+        rows = self.get_queryset().values(
+            'serial_number',
+            'robot_model',
+            'weight_limit',
+            'battery',
+            'state',
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+        def export_rows():
+            for row in rows:
+                row['robot_model'] = robot_models[row['robot_model']]
+                row['state'] = states[row['state']]
+                yield row
+
+        return StreamingHttpResponse(
+            iter_ndjson(export_rows()),
+            content_type=NDJSONRenderer.media_type,
+        )
+
     @action(detail=True, methods=['POST'])
+    @idempotent
     def load_package(self, request, *args, **kwargs):
         """Loads the package into the selected robot."""
-        obj = self.get_object()
-        return self.get_and_return_response(request, obj, True)
+        serializer = self.get_serializer(self.get_object(), data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        serializer_class=serializers.RobotBatchLoadSerializer,
+    )
+    @idempotent
+    def load(self, request, *args, **kwargs):
+        """Load packages into many robots in one transaction."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        robots = serializer.save()
+
+        return Response(
+            serializers.RobotAddSerializer(robots, many=True).data,
+            status=status.HTTP_200_OK,
+        )
 
     @action(detail=True)
     def check_package(self, request, *args, **kwargs):
         """Return the packages loaded into the selected robot."""
-        obj = self.get_object()
-        return self.get_and_return_response(request, obj)
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
 
     @action(detail=True)
     def check_battery(self, request, *args, **kwargs):
         """Check the battery of the robot."""
-        obj = self.get_object()
-        return self.get_and_return_response(request, obj)
-
-    def get_and_return_response(self, request, obj, update=False):
-        serializer = self.get_serializer(obj, data=request.data)
-
-        if serializer.is_valid():
-            if update:
-                serializer.update(obj, request.data)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
@@ -0,0 +1,70 @@
+"""
+Tests for the query budgets of the user API.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetTestMixin
+from user.views import CreateTokenView, CreateUserView, ManageUserView
+
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+class UserQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the user API makes as many queries for few or many users."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='12345678',
+            name='Test Name',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.users = 0
+
+    def grow(self):
+        """Add many more users."""
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f'test{i}@example.com')
+            for i in range(self.users, self.users + 20)
+        )
+        self.users += 20
+
+    def test_create(self):
+        """Test creating a user."""
+        self.assertQueryBudget(CreateUserView, 'post', lambda i: (
+            self.client.post(CREATE_USER_URL, {
+                'email': f'new{i}@example.com',
+                'password': '12345678',
+                'name': 'New',
+            })
+        ), self.grow)
+
+    def test_token(self):
+        """Test creating a token."""
+        self.assertQueryBudget(CreateTokenView, 'post', lambda i: (
+            self.client.post(TOKEN_URL, {
+                'email': 'test@example.com',
+                'password': '12345678',
+            })
+        ), self.grow)
+
+    def test_retrieve_profile(self):
+        """Test retrieving the profile."""
+        self.assertQueryBudget(ManageUserView, 'get', lambda i: (
+            self.client.get(ME_URL)
+        ), self.grow)
+
+    def test_update_profile(self):
+        """Test updating the profile."""
+        self.assertQueryBudget(ManageUserView, 'patch', lambda i: (
+            self.client.patch(ME_URL, {'name': f'Name {i}'})
+        ), self.grow)
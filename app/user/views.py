@@ -5,28 +5,38 @@ from rest_framework import generics, authentication, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.views import ServerTimingMixin
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
 )
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ServerTimingMixin, generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    # The token lookup of the authentication, the unique check of the email
+    # and the insert.
+    query_budgets = {'post': 3}
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(ServerTimingMixin, ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
+    # The token lookup of the authentication, the user, then the token,
+    # created in a savepoint when the user has none.
+    query_budgets = {'post': 5}
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ServerTimingMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user. """
     serializer_class = UserSerializer
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    # The token lookup of the authentication, which loads the user, and the
+    # update of the user.
+    query_budgets = {'get': 1, 'put': 2, 'patch': 2}
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
@@ -0,0 +1,28 @@
+server {
+    listen ${LISTEN_PORT};
+
+    location /static {
+        alias /vol/static;
+        expires 7d;
+        access_log off;
+        gzip on;
+        gzip_types text/css application/javascript image/svg+xml;
+        sendfile on;
+        tcp_nopush on;
+    }
+
+    # Scraped from the internal network, on the app service directly.
+    location = /metrics {
+        deny all;
+    }
+
+    location / {
+        proxy_pass              http://${APP_HOST}:${APP_PORT};
+        proxy_set_header        Host $host;
+        proxy_set_header        X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header        X-Forwarded-Proto $scheme;
+        proxy_http_version      1.1;
+        proxy_set_header        Connection "";
+        client_max_body_size    10M;
+    }
+}
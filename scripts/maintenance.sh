@@ -0,0 +1,14 @@
+#!/bin/sh
+
+set -e
+
+# Periodic cleanup for the lifetime of a deploy, run as its own service
+# next to the app containers.
+
+python manage.py wait_for_db
+
+while true; do
+    python manage.py clear_idempotency_keys
+    python manage.py delete_queued_files
+    sleep "${MAINTENANCE_INTERVAL:-3600}"
+done
@@ -0,0 +1,20 @@
+#!/bin/sh
+
+set -e
+
+python manage.py wait_for_db
+python manage.py collectstatic --noinput
+python manage.py migrate
+python manage.py generate_schema
+python manage.py clear_idempotency_keys
+
+if [ -n "$METRICS_DIR" ]; then
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
+
+if [ "$GUNICORN_WORKER_CLASS" = "uvicorn.workers.UvicornWorker" ]; then
+    exec gunicorn app.asgi:application
+fi
+
+exec gunicorn app.wsgi:application